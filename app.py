@@ -2,31 +2,127 @@
 import os
 import time
 import json
-import pandas as pd
-from flask import Flask, jsonify, send_from_directory, request
+import hashlib
+import pickle
+import sqlite3
+import gzip
+import importlib
+from flask import Flask, Response, abort, jsonify, request
+from flask.json.provider import DefaultJSONProvider
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 from werkzeug.middleware.proxy_fix import ProxyFix
 import re
-from datetime import datetime, timedelta
+import glob
+import fnmatch
+from datetime import date, datetime, timedelta
+from functools import lru_cache, wraps
+from contextlib import contextmanager
+from bisect import bisect_left
 import threading
+import multiprocessing
+import queue
+import atexit
+import mmap
+import mimetypes
+import sys
+import shutil
+import tempfile
+import subprocess
+from dataclasses import dataclass, field, replace
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 import logging
-import pyttsx3
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.cron import CronTrigger
-import numpy as np
 
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+try:
+    import brotli
+except ImportError:  # 未安装brotli时只提供gzip压缩
+    brotli = None
 
-app = Flask(__name__)
+class LazyModule:
+    """
+    首次访问属性时才导入的模块。pandas、numpy、openpyxl、pyttsx3 导入较慢，
+    启动时不需要（先用上次保存的数据提供服务），第一次解析工作簿或播报时才导入。
+    """
+    def __init__(self, name):
+        self._lazy_name = name
+
+    def __getattr__(self, attr):
+        module = importlib.import_module(self._lazy_name)
+        # 导入后把模块属性复制到本对象，之后的访问不再经过 __getattr__
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+pd = LazyModule('pandas')
+np = LazyModule('numpy')
+openpyxl = LazyModule('openpyxl')
+pyttsx3 = LazyModule('pyttsx3')
+# openpyxl.cell.cell 中的单元格类型
+TYPE_ERROR = 'e'
+TYPE_NUMERIC = 'n'
+
+LOG_LEVEL = logging.INFO  # 排查问题时可改为 logging.DEBUG
+LOG_ROWS = False  # 逐行记录读取到的项目（需同时开启DEBUG），生产环境不要打开
+logging.basicConfig(level=LOG_LEVEL, format='%(asctime)s - %(levelname)s - %(message)s')
+
+class MonitorJSONProvider(DefaultJSONProvider):
+    """项目（ProjectRow）按字段输出为JSON对象"""
+    @staticmethod
+    def default(o):
+        if isinstance(o, ProjectRow):
+            return o.to_dict()
+        return DefaultJSONProvider.default(o)
+
+app = Flask(__name__, static_folder=None)  # 静态资源由 StaticAssets 提供
+app.json = MonitorJSONProvider(app)
 app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1, x_host=1, x_prefix=1)
 
 # 配置
 EXCEL_FILE_PATH = '计划安排进度表.xlsx'
+EXCEL_SHEET_NAME = '进度表（6.3~6.16）'  # None 为自动选用周期最新的进度表
+EXCEL_HEADER_ROW = 3  # 项目表头所在行（从0开始），项目数据从下一行开始
+EXCEL_SINGLE_PASS = True  # 只读流式单次读取Excel，失败时回退到两次read_excel
+# 监控多个工作簿时的配置，None 为只读取 EXCEL_FILE_PATH 的 EXCEL_SHEET_NAME。每项：
+#   path  工作簿路径，文件名部分可用通配符，如 '各船厂/*.xlsx'
+#   sheet 表名、表名通配符（如 '进度表*'，匹配多张表都读取），或 None（周期最新的进度表）
+# 多个来源合并为一份数据，每个项目带 source 字段（工作簿名/表名）
+WORKBOOK_SOURCES = None
+PARSE_WORKERS = 0  # 多个工作簿同时变化时的解析进程数，0为CPU核数，1为不使用进程池
 JSON_OUTPUT_PATH = 'progress_data.json'
 SETTINGS_PATH = 'alert_settings.json'
 CACHE_TIMEOUT = 30  # 数据缓存时间(秒)
+PARSE_CACHE_PATH = 'progress_cache.pkl'  # 解析结果缓存，冷启动时工作簿未变则跳过解析
+PARSE_CACHE_VERSION = 2  # 解析结果（ProjectRow 字段、sheets 结构）的格式变化时加一，旧缓存自动丢弃
+DELTA_HISTORY_SIZE = 100  # 保留的增量版本数，更早的版本返回全量数据
+RESPONSE_CACHE_SIZE = 32  # 每个缓存代最多保存的已序列化响应数
+COMPRESS_MIN_SIZE = 1024  # 小于该大小的响应不压缩
+STATIC_DIR = 'static'  # 页面和静态资源目录，只有该目录中的文件对外提供
+STATIC_MAX_AGE = 365 * 24 * 3600  # 带内容指纹的资源地址的缓存时间(秒)
+STREAM_KEEPALIVE = 15  # SSE心跳间隔(秒)
+# 多进程部署时每个进程最多保持的SSE连接数，超过时返回503，看板改为轮询（gthread每个连接一直占用一个线程，
+# 应小于 gunicorn 的 --threads，留出线程处理 /api/data 等请求）；单进程运行时每个连接一个新线程，不限制
+STREAM_MAX_CLIENTS = 24
+STREAM_RETRY_AFTER = 60  # 连接数已满时建议前端重试的间隔(秒)
+REFRESH_DEBOUNCE = 0.5  # 文件事件防抖：最后一次事件后多久没有新事件才开始刷新(秒)
+REFRESH_STABLE_TIME = 0.5  # 文件大小和修改时间保持不变多久才认为保存完成(秒)
+REFRESH_MAX_WAIT = 30  # 等待文件稳定的最长时间(秒)
 ALERT_DATA_PATH = 'alert_data.json'
+HISTORY_DB_PATH = 'progress_history.sqlite'  # 进度历史库（SQLite），None为不记录历史
+HISTORY_DEFAULT_DAYS = 31  # /api/history 既不指定项目也不指定时间时查询的天数
+SHARED_STATE_DIR = 'shared_state'  # 多进程部署时领导进程发布快照和事件的目录（见 wsgi.py）
+SHARED_POLL_INTERVAL = 0.5  # 工作进程检查共享快照、竞争领导锁的间隔(秒)
+SHARED_DELTA_RESPONSES = 10  # 领导进程为最近几个版本预先生成 ?since= 增量响应，工作进程直接使用
+SHARED_BODY_FILES = 3  # 保留的共享响应体文件数
+WARM_START = True  # 启动时先用上次保存的 progress_data.json/alert_data.json 提供数据，首次解析在后台进行
+JSON_INDENT = None  # 持久化JSON的缩进，None为紧凑格式（需要人工查看时可设为4）
+ALERT_SCHEDULE_MODE = 'date'  # 'date': 只为有预警的日期注册一次性任务；'cron': 每天两次定时全量检查
+ALERT_JOBSTORE_PATH = None  # 预警任务持久化的SQLite文件（如 'alert_jobs.sqlite'），需要安装SQLAlchemy
+ALERT_MISFIRE_GRACE = 600  # 错过预警时间后仍补发的宽限时间(秒)，例如重启期间到期的任务
+TTS_BACKEND = 'pyttsx3'  # 'pyttsx3' 或 'null'（无声卡的服务器/测试，只记录不播放）
+TTS_QUEUE_SIZE = 8  # 待播报消息队列上限，满了丢弃新消息
+TTS_REPEAT = 2  # 每条消息播报次数
+TTS_CACHE_DIR = 'tts_cache'  # 合成语音缓存目录，None为不缓存
+TTS_CACHE_MAX_FILES = 200  # 语音缓存最多保留的文件数
 
 # 默认设置
 DEFAULT_SETTINGS = {
@@ -35,17 +131,386 @@ DEFAULT_SETTINGS = {
     'last_modified': 0
 }
 
-# 内存缓存
-data_cache = {
-    'timestamp': 0,
-    'data': None,
-    'periods': None,
-    'alerts': []  # 存储预警信息
-}
+def alert_time_on(day, time_str):
+    """某天的预警时间点，time_str 形如 13:59"""
+    alert_hour, alert_minute = map(int, time_str.split(':'))
+    return datetime(day.year, day.month, day.day, alert_hour, alert_minute)
+
+class AlertIndex:
+    """
+    按预警日期索引的项目，入库时构建一次。
+    提前一天预警查 明天 的项目，当天预警查 今天 的项目，不需要扫描全部项目。
+    """
+    def __init__(self, rows=(), alert_dates=None):
+        alert_dates = alert_dates or {}
+        self.by_date = {}
+        for row in rows:
+            alert_date = alert_dates.get(row['key'])
+            # 预警日期、项目名称和预警内容都不能为空
+            if not alert_date:
+                continue
+            if not str(row['project_name']).strip() or not str(row['alert_content']).strip():
+                continue
+            self.by_date.setdefault(alert_date, []).append(row)
+        self.dates = sorted(self.by_date)
+
+    def __len__(self):
+        return sum(len(rows) for rows in self.by_date.values())
+
+    def projects_on(self, day):
+        """预警日期为 day 的项目（保持表格中的顺序）"""
+        return self.by_date.get(day, [])
+
+    def next_due(self, settings, now=None):
+        """下一次有项目需要预警的时间点，没有则返回None"""
+        now = now or datetime.now()
+        try:
+            afternoon = settings.get('afternoon_alert_time', '13:59')
+            morning = settings.get('morning_alert_time', '00:00')
+            best = None
+            for day in self.dates[bisect_left(self.dates, now.date()):]:
+                # 该日期的两个预警时间点都不早于前一天0点，已找到更早的时间点即可停止
+                if best is not None and datetime(day.year, day.month, day.day) - timedelta(days=1) > best:
+                    break
+                for due in (alert_time_on(day - timedelta(days=1), afternoon), alert_time_on(day, morning)):
+                    if due > now and (best is None or due < best):
+                        best = due
+            return best
+        except Exception as e:
+            logging.error(f"时间检查错误: {str(e)}")
+            return None
+
+@dataclass(frozen=True)
+class CacheSnapshot:
+    """
+    一代缓存数据，发布后不再修改。刷新时构造新快照并整体替换 current_snapshot，
+    读者只取一次引用，不会看到刷新到一半的数据。
+    """
+    data: list = None
+    periods: dict = None
+    alerts: list = field(default_factory=list)  # 存储预警信息
+    active_alerts: list = field(default_factory=list)  # 活跃预警数据（返回给前端）
+    alert_settings: dict = field(default_factory=dict)
+    alert_index: AlertIndex = field(default_factory=AlertIndex)  # 入库时构建的预警日期索引
+    filter_index: dict = field(default_factory=dict)  # 入库时构建的筛选索引 {字段: {值: [行号]}}
+    sources: tuple = ()  # 数据来源：每个工作簿/表的路径、表名、行数和周期信息
+    version: int = 0  # 数据版本，每次项目数据变化加1
+    deltas: tuple = ()  # 增量历史：(版本, [(操作, 项目key, 项目数据)], 顺序是否变化)
+    display: dict = field(default_factory=dict)  # 与日期有关的显示标记，见 build_display_flags
+    warm: bool = False  # 启动时由上次保存的数据恢复，还没有解析过工作簿
+    generated_at: float = 0
+    responses: dict = field(default_factory=dict, compare=False)  # 已序列化的/api/data响应，按since参数缓存
+    shared_responses: dict = field(default_factory=dict, compare=False)  # 工作进程：领导进程发布的共享响应（映射的响应体）
+
+# 当前发布的快照（版本以启动时间为起点，重启后不会回退）
+current_snapshot = CacheSnapshot(version=int(time.time() * 1000))
+# 单飞锁：同一时间只有一个线程刷新缓存
+refresh_lock = threading.Lock()
+# 上次刷新时间，只由持有 refresh_lock 的线程写入
+last_refresh = 0
+
+# 解析缓存：每个来源 (工作簿路径, 表规则) 按签名(mtime/大小)和内容哈希记录上次解析结果
+# {(路径, 表规则): {'signature', 'hash', 'sheets': [(表名, 项目数据, 周期信息)]}}
+parse_cache = {}
+# 上次合并的结果，各来源都没有重新解析时直接复用（保持同一个列表对象）
+merged_workbooks = {'parts': None, 'data': None, 'periods': None, 'sources': ()}
+parse_pool = None
+
+# 进程角色：'standalone' 单进程运行；多进程部署时 'leader' 负责监听、解析和定时预警，'worker' 只读共享快照
+process_role = 'standalone'
 
-# 存储当前活动的预警 
+# 存储当前活动的预警（只在持有 refresh_lock 时修改，读者使用快照中的副本）
 active_alerts = {}
-scheduler = BackgroundScheduler()
+
+def create_scheduler():
+    """创建调度器，配置了 ALERT_JOBSTORE_PATH 时任务保存在SQLite中，重启后不丢失"""
+    from apscheduler.schedulers.background import BackgroundScheduler
+    jobstores = {}
+    if ALERT_JOBSTORE_PATH:
+        try:
+            from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+        except ImportError:  # 未安装SQLAlchemy时预警任务只保存在内存中
+            logging.warning("未安装SQLAlchemy，预警任务不会持久化")
+        else:
+            jobstores['default'] = SQLAlchemyJobStore(url=f'sqlite:///{os.path.abspath(ALERT_JOBSTORE_PATH)}')
+    return BackgroundScheduler(jobstores=jobstores)
+
+# 定时预警的调度器，第一次使用时由 get_scheduler 创建：APScheduler 导入较慢，
+# 只读的工作进程和导入本模块的脚本不需要它
+scheduler = None
+
+def get_scheduler():
+    """返回调度器，第一次调用时创建"""
+    global scheduler
+    if scheduler is None:
+        scheduler = create_scheduler()
+    return scheduler
+
+class EventBroker:
+    """SSE事件广播：每个订阅连接一个队列，队列满时丢弃该连接的新事件"""
+    def __init__(self, queue_size=100):
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._queue_size = queue_size
+        self._sequence = 0
+        self.history = deque(maxlen=queue_size)  # 最近的事件 (时间, 序号, 事件, 数据)，多进程部署时发给工作进程
+
+    def subscribe(self, limit=None):
+        """订阅者数量已达 limit 时返回None"""
+        subscriber = queue.Queue(maxsize=self._queue_size)
+        with self._lock:
+            if limit is not None and len(self._subscribers) >= limit:
+                return None
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, event, data):
+        with self._lock:
+            self._sequence += 1
+            self.history.append((time.time(), self._sequence, event, data))
+        self.deliver(event, data)
+        if process_role == 'leader':
+            publish_shared_events()
+
+    def deliver(self, event, data):
+        """只发给本进程的订阅者（工作进程转发领导进程的事件时使用）"""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait((event, data))
+            except queue.Full:
+                logging.warning(f"SSE订阅队列已满，丢弃事件: {event}")
+
+event_broker = EventBroker()
+
+# 刷新统计：收到的文件事件数、后台刷新次数、实际解析Excel次数
+refresh_stats = {
+    'events': 0,
+    'refreshes': 0,
+    'parses': 0,
+    'last_refresh_duration': 0
+}
+
+METRIC_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+METRICS = []  # 所有指标，按注册顺序输出到 /metrics
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+class Metric:
+    """Prometheus文本格式的指标，按标签值分别统计"""
+    kind = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+        METRICS.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key, extra=()):
+        pairs = list(zip(self.labelnames, key)) + list(extra)
+        if not pairs:
+            return ''
+        return '{' + ','.join(f'{name}="{_escape_label(value)}"' for name, value in pairs) + '}'
+
+    def samples(self):
+        return []
+
+    def expose(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        lines.extend(self.samples())
+        return lines
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        if not self.labelnames:
+            self._values[()] = 0
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f'{self.name}{self._labels(key)} {value}' for key, value in values]
+
+class Gauge(Metric):
+    """抓取时调用 func 取当前值（kind='counter' 用于已有的累计计数）"""
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, func, kind='gauge'):
+        super().__init__(name, documentation)
+        self.func = func
+        self.kind = kind
+
+    def samples(self):
+        return [f'{self.name} {self.func()}']
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=METRIC_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = buckets
+
+    def observe(self, seconds, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            position = bisect_left(self.buckets, seconds)
+            if position < len(self.buckets):
+                state[0][position] += 1
+            state[1] += seconds
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        with self._lock:
+            values = sorted((key, ([*state[0]], state[1], state[2])) for key, state in self._values.items())
+        lines = []
+        for key, (counts, total, count) in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{self._labels(key, [("le", bound)])} {cumulative}')
+            lines.append(f'{self.name}_bucket{self._labels(key, [("le", "+Inf")])} {count}')
+            lines.append(f'{self.name}_sum{self._labels(key)} {total}')
+            lines.append(f'{self.name}_count{self._labels(key)} {count}')
+        return lines
+
+def timed(histogram):
+    """装饰器：把函数耗时记录到 histogram"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with histogram.time():
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+EXCEL_PARSE_SECONDS = Histogram('progress_excel_parse_seconds', '解析一个工作簿(safe_convert_excel)的耗时')
+EXCEL_PARSE_FAILURES = Counter('progress_excel_parse_failures_total', '工作簿解析失败次数')
+PARSE_CACHE_LOOKUPS = Counter('progress_parse_cache_total', '刷新时工作簿解析缓存的命中情况', ['result'])
+CHECK_ALERTS_SECONDS = Histogram('progress_check_alerts_seconds', 'check_alerts 耗时')
+UPDATE_ALERTS_SECONDS = Histogram('progress_update_active_alerts_seconds', 'update_active_alerts 耗时')
+JSON_WRITE_SECONDS = Histogram('progress_file_write_seconds', '后台序列化并写入文件的耗时', ['file'])
+API_DATA_SECONDS = Histogram('progress_api_data_seconds', '/api/data 请求处理耗时')
+RESPONSE_CACHE_LOOKUPS = Counter('progress_response_cache_total', '/api/data 已序列化响应缓存的命中情况', ['result'])
+STREAM_REJECTED = Counter('progress_stream_rejected_total', '连接数已满被拒绝的SSE连接数')
+
+def write_atomic(path, content):
+    """
+    先写同目录下的临时文件再替换，读者不会读到写了一半的文件。
+    临时文件名每次不同，同时写同一个文件（如两个请求保存设置）时不会互相覆盖临时文件。
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.',
+                                    prefix=f'.{os.path.basename(path)}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)  # mkstemp 创建的文件只有所有者可读
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def dump_json(obj):
+    """持久化用的JSON编码，默认紧凑格式"""
+    separators = (',', ':') if JSON_INDENT is None else None
+    # 日期单元格按 /api/data 的格式保存，预热启动时读回的数据与接口返回的一致
+    return json.dumps(obj, ensure_ascii=False, indent=JSON_INDENT, separators=separators,
+                      default=app.json.default).encode('utf-8')
+
+class PersistenceWriter:
+    """
+    后台写文件线程：每个文件只保留最新一份待写内容（多次提交合并为一次写入），
+    序列化也在后台线程中进行；内容与文件现有内容相同时跳过写入。
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._pending = {}  # 路径 -> (生成文件内容的函数, 出错时的日志前缀)
+        self._written = {}  # 路径 -> 上次写入内容的哈希
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def submit(self, path, serialize, error_message):
+        with self._lock:
+            self._pending[path] = (serialize, error_message)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='persistence-writer', daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+
+    def flush(self):
+        """立即写出所有待写内容（退出时调用）"""
+        with self._write_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            for path, (serialize, error_message) in pending.items():
+                self._write(path, serialize, error_message)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            self.flush()
+
+    def _digest_on_disk(self, path):
+        try:
+            with open(path, 'rb') as f:
+                return hashlib.blake2b(f.read(), digest_size=16).digest()
+        except OSError:
+            return None
+
+    def _write(self, path, serialize, error_message):
+        try:
+            with JSON_WRITE_SECONDS.time(file=os.path.basename(path)):
+                self._write_content(path, serialize)
+        except Exception as e:
+            logging.error(f"{error_message}: {str(e)}")
+
+    def _write_content(self, path, serialize):
+        content = serialize()
+        digest = hashlib.blake2b(content, digest_size=16).digest()
+        if path not in self._written:
+            self._written[path] = self._digest_on_disk(path)
+        if digest == self._written[path]:
+            return
+        write_atomic(path, content)
+        self._written[path] = digest
+
+persistence_writer = PersistenceWriter()
+atexit.register(persistence_writer.flush)
 
 # 加载设置
 def load_settings():
@@ -63,8 +528,7 @@ def load_settings():
 # 保存设置
 def save_settings(settings):
     try:
-        with open(SETTINGS_PATH, 'w', encoding='utf-8') as f:
-            json.dump(settings, f, ensure_ascii=False, indent=4)
+        write_atomic(SETTINGS_PATH, json.dumps(settings, ensure_ascii=False, indent=4).encode('utf-8'))
         return True
     except:
         return False
@@ -72,27 +536,155 @@ def save_settings(settings):
 # 初始化设置
 alert_settings = load_settings()
 
-def safe_convert_excel():
+def _convert_cell(cell):
+    """单元格取值，与pandas的openpyxl引擎保持一致"""
+    if cell.value is None:
+        return ''
+    elif cell.data_type == TYPE_ERROR:
+        return np.nan
+    elif cell.data_type == TYPE_NUMERIC:
+        val = int(cell.value)
+        if val == cell.value:
+            return val
+        return float(cell.value)
+    return cell.value
+
+def read_excel_single_pass(path=None, sheet_name=None):
+    """
+    只打开一次工作簿（只读流式模式），逐行读取后在内存中拆分：
+    前几行为周期信息，第4行为表头，之后为项目数据。
+    返回 (df_all, df)，df_all 只包含表头之前的周期行。
+    """
+    path = path or EXCEL_FILE_PATH
+    sheet_name = sheet_name or EXCEL_SHEET_NAME or resolve_sheet_names(path, None)[0]
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True, keep_links=False)
+    try:
+        sheet = workbook[sheet_name]
+        sheet.reset_dimensions()
+        rows = []
+        last_row_with_data = -1
+        for row_number, row in enumerate(sheet.iter_rows()):
+            converted_row = [_convert_cell(cell) for cell in row]
+            while converted_row and converted_row[-1] == '':
+                converted_row.pop()
+            if converted_row:
+                last_row_with_data = row_number
+            rows.append(converted_row)
+    finally:
+        workbook.close()
+
+    # 去掉末尾空行并补齐列宽（与pd.read_excel一致）
+    rows = rows[:last_row_with_data + 1]
+    if rows:
+        max_width = max(len(row) for row in rows)
+        rows = [row + [''] * (max_width - len(row)) for row in rows]
+
+    df_all = pd.io.parsers.TextParser(rows[:EXCEL_HEADER_ROW], header=None, skip_blank_lines=False).read()
+    df = pd.io.parsers.TextParser(
+        rows,
+        header=EXCEL_HEADER_ROW,
+        usecols=list(range(14)),  # A:N，包含预警日期和预警列
+        skip_blank_lines=False
+    ).read()
+    return df_all, df
+
+def read_excel_two_pass(path=None, sheet_name=None):
+    """原有读取方式：周期信息和项目数据分两次 read_excel"""
+    path = path or EXCEL_FILE_PATH
+    sheet_name = sheet_name or EXCEL_SHEET_NAME or resolve_sheet_names(path, None)[0]
+    try:
+        df_all = pd.read_excel(
+            path,
+            sheet_name=sheet_name,
+            header=None,
+            engine='openpyxl'
+        )
+        logging.debug('使用openpyxl成功读取Excel文件')
+    except Exception as e:
+        logging.warning(f'使用openpyxl读取Excel文件失败: {e}，尝试其他方式')
+        df_all = pd.read_excel(
+            path,
+            sheet_name=sheet_name,
+            header=None
+        )
+        logging.debug('使用其他方式成功读取Excel文件')
+
+    # 提取项目数据（从第4行开始）
+    try:
+        df = pd.read_excel(
+            path,
+            sheet_name=sheet_name,
+            header=EXCEL_HEADER_ROW,
+            usecols="A:N",  # 包含预警日期和预警列
+            engine='openpyxl'
+        )
+    except Exception as e:
+        df = pd.read_excel(
+            path,
+            sheet_name=sheet_name,
+            header=EXCEL_HEADER_ROW
+        )
+        df = df.iloc[:, :14]  # 确保只取前14列（包含预警日期和预警列）
+    return df_all, df
+
+# 项目列（新增alert_date和alert_content列）
+PROJECT_COLUMNS = [
+    'id', 'client', 'project_name', 'product_name', 'classification',
+    'delivery_date', 'responsible', 'workshop_progress', 'drawing',
+    'software', 'simulation', 'listing', 'alert_date', 'alert_content'
+]
+PERCENT_COLUMNS = ['drawing', 'software', 'simulation', 'listing']
+HEADER_ROW_MARKERS = '计划出货时间|出货日期计划安排表'
+
+def _clean_percent_column(values):
+    """进度列转为0~100整数：字符串取第一个数字，其它取整，无法识别的为0"""
+    result = np.trunc(pd.to_numeric(values, errors='coerce'))
+    is_text = np.fromiter((isinstance(v, str) for v in values.values), dtype=bool, count=len(values))
+    if is_text.any():
+        digits = values[is_text].str.extract(r'(\d+)', expand=False)
+        result[is_text] = digits.astype(float)
+    return result.fillna(0).clip(0, 100).astype(int)
+
+def clean_project_rows(df):
+    """按列清洗项目数据，返回项目列表（ProjectRow）"""
+    df = df.copy()
+    df.columns = PROJECT_COLUMNS
+
+    # 过滤重复的表头行和单位为空的行
+    client = df['client']
+    client_missing = client.isna()
+    client_text = client.where(~client_missing, '').astype(str)
+    keep = ~client_missing & (client_text.str.strip() != '') & \
+        ~client_text.str.contains(HEADER_ROW_MARKERS, regex=True)
+    df = df[keep]
+
+    columns = {'id': list(range(1, len(df) + 1))}
+    for col in PROJECT_COLUMNS[1:]:
+        if col in PERCENT_COLUMNS:
+            columns[col] = _clean_percent_column(df[col]).tolist()
+        else:
+            # 缺失值替换为空字符串
+            columns[col] = df[col].astype(object).where(df[col].notna(), '').tolist()
+    valid_rows = [ProjectRow.from_values(values) for values in zip(*columns.values())]
+
+    if LOG_ROWS and logging.getLogger().isEnabledFor(logging.DEBUG):
+        for row in valid_rows:
+            logging.debug(f"读取项目: ID={row['id']}, 预警日期={row['alert_date']}, 预警内容={row['alert_content']}")
+    return valid_rows
+
+def safe_convert_excel(path=None, sheet_name=None):
     """安全转换Excel文件，带错误恢复机制"""
     try:
-        # 尝试多种读取方式
         logging.debug('开始尝试读取Excel文件')
-        try:
-            df_all = pd.read_excel(
-                EXCEL_FILE_PATH,
-                sheet_name='进度表（6.3~6.16）',
-                header=None,
-                engine='openpyxl'
-            )
-            logging.debug('使用openpyxl成功读取Excel文件')
-        except Exception as e:
-            logging.warning(f'使用openpyxl读取Excel文件失败: {e}，尝试其他方式')
-            df_all = pd.read_excel(
-                EXCEL_FILE_PATH,
-                sheet_name='进度表（6.3~6.16）',
-                header=None
-            )
-            logging.debug('使用其他方式成功读取Excel文件')
+        df_all = df = None
+        if EXCEL_SINGLE_PASS:
+            try:
+                df_all, df = read_excel_single_pass(path, sheet_name)
+                logging.debug('单次流式读取Excel文件成功')
+            except Exception as e:
+                logging.warning(f'单次读取Excel文件失败: {e}，回退到两次读取')
+        if df is None:
+            df_all, df = read_excel_two_pass(path, sheet_name)
         
         # 提取周期信息
         periods = {
@@ -128,155 +720,261 @@ def safe_convert_excel():
         except Exception as e:
             pass
         
-        # 提取项目数据（从第4行开始）
-        try:
-            df = pd.read_excel(
-                EXCEL_FILE_PATH,
-                sheet_name='进度表（6.3~6.16）',
-                header=3,
-                usecols="A:N",  # 包含预警日期和预警列
-                engine='openpyxl'
-            )
-        except Exception as e:
-            df = pd.read_excel(
-                EXCEL_FILE_PATH,
-                sheet_name='进度表（6.3~6.16）',
-                header=3
-            )
-            df = df.iloc[:, :14]  # 确保只取前14列（包含预警日期和预警列）
-        
-        # 列名处理（新增alert_date和alert_content列）
-        df.columns = [
-            'id', 'client', 'project_name', 'product_name', 'classification',
-            'delivery_date', 'responsible', 'workshop_progress', 'drawing',
-            'software', 'simulation', 'listing', 'alert_date', 'alert_content'
-        ]
-        
-        # 数据清洗
-        valid_rows = []
-        current_id = 1
-        def get_first(x):
-            if isinstance(x, (list, tuple, np.ndarray, pd.Series)):
-                return x[0]
-            return x
-        def isna_all(x):
-            v = pd.isna(x)
-            if isinstance(v, (np.ndarray, pd.Series)):
-                return v.all()
-            return v
-        for _, row in df.iterrows():
-            client = get_first(row['client'])
-            if isinstance(client, str) and ('计划出货时间' in client or '出货日期计划安排表' in client):
-                continue
-            if isna_all(client) or str(client).strip() == '':
-                continue
-            valid_row = {
-                'id': current_id,
-                'client': client if not isna_all(client) else '',
-                'project_name': get_first(row['project_name']) if not isna_all(get_first(row['project_name'])) else '',
-                'product_name': get_first(row['product_name']) if not isna_all(get_first(row['product_name'])) else '',
-                'classification': get_first(row['classification']) if not isna_all(get_first(row['classification'])) else '',
-                'delivery_date': get_first(row['delivery_date']) if not isna_all(get_first(row['delivery_date'])) else '',
-                'responsible': get_first(row['responsible']) if not isna_all(get_first(row['responsible'])) else '',
-                'workshop_progress': get_first(row['workshop_progress']) if not isna_all(get_first(row['workshop_progress'])) else '',
-                'drawing': get_first(row['drawing']) if not isna_all(get_first(row['drawing'])) else 0,
-                'software': get_first(row['software']) if not isna_all(get_first(row['software'])) else 0,
-                'simulation': get_first(row['simulation']) if not isna_all(get_first(row['simulation'])) else 0,
-                'listing': get_first(row['listing']) if not isna_all(get_first(row['listing'])) else 0,
-                'alert_date': get_first(row['alert_date']) if not isna_all(get_first(row['alert_date'])) else '',
-                'alert_content': get_first(row['alert_content']) if not isna_all(get_first(row['alert_content'])) else ''
-            }
-            # 添加调试日志
-            logging.debug(f"读取项目: ID={current_id}, 预警日期={valid_row['alert_date']}, 预警内容={valid_row['alert_content']}")
-            valid_rows.append(valid_row)
-            current_id += 1
-        
-        # 数值类型转换
-        for row in valid_rows:
-            for col in ['drawing', 'software', 'simulation', 'listing']:
-                try:
-                    value = row[col]
-                    # 只对list/tuple/np.ndarray/pd.Series取第一个元素
-                    if isinstance(value, (list, tuple, np.ndarray, pd.Series)):
-                        value = value[0]
-                    if isinstance(value, str):
-                        numbers = re.findall(r'\d+', value)
-                        if numbers:
-                            value = int(numbers[0])
-                        else:
-                            value = 0
-                    else:
-                        value = int(float(value))
-                    row[col] = max(0, min(100, value))
-                except (ValueError, TypeError, IndexError):
-                    row[col] = 0
-        
+        valid_rows = clean_project_rows(df)
         return valid_rows, periods
     except Exception as e:
         logging.error(f"Excel转换错误: {str(e)}")
         return None, None
 
-# 增强日期解析函数
-def parse_alert_date(date_str):
-    if pd.isna(date_str) or date_str == '' or str(date_str).strip().lower() in ['待定', 'none', 'null', 'nan']:
+# 显示字段：入库时按项目数据计算一次，前端直接使用
+DISPLAY_FIELDS = ['delivery_day', 'delivery_label', 'delivery_mark', 'status']
+DELIVERY_DATE_PATTERN = re.compile(r'(\d{4})[\.\-\/](\d{1,2})[\.\-\/](\d{1,2})')
+DELIVERY_MARKS = ('FAT', '船检', '船期')  # 交货日期一栏日期后的标记，按顺序取第一个
+# 车间进度 -> 状态分类（前端样式 status-<分类>），都不包含时为 production
+WORKSHOP_STATUS = (('待发货', 'ready'), ('待生产', 'waiting'), ('已发货', 'shipped'), ('调试中', 'debug'))
+DUE_SOON_DAYS = 7  # 交货日期在今天起 DUE_SOON_DAYS 天内的项目高亮
+
+_UNSET = ...  # ProjectRow 中未设置的字段（可以pickle，不会是单元格的值）
+
+class ProjectRow:
+    """
+    一个项目的数据，字段固定（表格列、显示字段、key、source），按 __slots__ 存储，
+    没有每行一个字典的开销；单位、船级、负责人等重复文本另由 compact_rows 驻留，各行只保存引用。
+    按字段名读写与字典相同（row['client']、row.get()、in、keys()/items()），JSON输出为对象。
+    未设置的字段（如单工作簿时的 source）视为不存在。
+    """
+    __slots__ = tuple(PROJECT_COLUMNS + DISPLAY_FIELDS + ['key', 'source'])
+
+    def __init__(self, items=()):
+        if isinstance(items, (dict, ProjectRow)):
+            items = items.items()
+        for name, value in items:
+            self[name] = value
+
+    @classmethod
+    def from_values(cls, values, names=PROJECT_COLUMNS):
+        row = cls.__new__(cls)
+        for name, value in zip(names, values):
+            setattr(row, name, value)
+        return row
+
+    def __getitem__(self, name):
+        if name in ROW_FIELD_SET:
+            try:
+                return getattr(self, name)
+            except AttributeError:
+                pass
+        raise KeyError(name)
+
+    def __setitem__(self, name, value):
+        if name not in ROW_FIELD_SET:
+            raise KeyError(f"未知字段: {name}")
+        setattr(self, name, value)
+
+    def __contains__(self, name):
+        return name in ROW_FIELD_SET and hasattr(self, name)
+
+    def get(self, name, default=None):
+        return getattr(self, name, default) if name in ROW_FIELD_SET else default
+
+    def keys(self):
+        return [name for name in self.__slots__ if hasattr(self, name)]
+
+    __iter__ = lambda self: iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def items(self):
+        return [(name, value) for name, value in zip(self.__slots__, self.state()) if value is not _UNSET]
+
+    def state(self):
+        """所有字段的值，未设置的为 _UNSET"""
+        return tuple(getattr(self, name, _UNSET) for name in self.__slots__)
+
+    def content(self):
+        """除按位置编号的id以外的所有字段，用于判断项目内容是否相同"""
+        return tuple(getattr(self, name, _UNSET) for name in ROW_CONTENT_FIELDS)
+
+    def copy(self, **changes):
+        row = ProjectRow.__new__(ProjectRow)
+        for name, value in zip(self.__slots__, self.state()):
+            value = changes.get(name, value)
+            if value is not _UNSET:
+                setattr(row, name, value)
+        return row
+
+    def to_dict(self):
+        return dict(self.items())
+
+    def __eq__(self, other):
+        if isinstance(other, ProjectRow):
+            return self.state() == other.state()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f'ProjectRow({self.to_dict()!r})'
+
+    def __reduce__(self):
+        # 按字段名保存（字段名元组在同一次pickle中只写一次），增减或调整字段后读取旧数据不会错位
+        return _restore_project_row, (self.__slots__, self.state())
+
+ROW_FIELD_SET = frozenset(ProjectRow.__slots__)
+ROW_CONTENT_FIELDS = tuple(name for name in ProjectRow.__slots__ if name != 'id')
+
+def _restore_project_row(names, state):
+    row = ProjectRow.__new__(ProjectRow)
+    for name, value in zip(names, state):
+        if value is not _UNSET and name in ROW_FIELD_SET:
+            setattr(row, name, value)
+    return row
+
+@lru_cache(maxsize=4096)
+def parse_delivery_text(text):
+    """交货日期一栏（如 '2025.6.26\\nFAT'）-> (ISO日期或None, 显示文本, 标记或None)"""
+    day = None
+    match = DELIVERY_DATE_PATTERN.search(text)
+    if match:
+        try:
+            day = date(int(match.group(1)), int(match.group(2)), int(match.group(3))).isoformat()
+        except ValueError:
+            pass
+    mark = next((mark for mark in DELIVERY_MARKS if mark in text), None)
+    label = text.replace(mark, '') if mark else text
+    return day, ' '.join(label.split()), mark
+
+def workshop_status(workshop):
+    return next((status for keyword, status in WORKSHOP_STATUS if keyword in workshop), 'production')
+
+def derive_display_fields(rows):
+    """
+    在 safe_convert_excel 之后为每个项目计算显示字段：
+    delivery_day（交货日期，ISO格式）、delivery_label（去掉标记的交货日期文本）、
+    delivery_mark（FAT/船检/船期）、status（车间进度分类）。
+    """
+    for row in rows:
+        delivery = row['delivery_date']
+        if isinstance(delivery, (datetime, date)):
+            # 日期单元格
+            delivery = f'{delivery.year}.{delivery.month}.{delivery.day}'
+        row['delivery_day'], row['delivery_label'], row['delivery_mark'] = parse_delivery_text(str(delivery))
+        row['status'] = workshop_status(str(row['workshop_progress']))
+    return rows
+
+def build_display_flags(rows, alert_index, today):
+    """
+    与日期有关的显示标记，每代数据每天计算一次，所有前端看到相同的结果：
+    due_soon 交货日期在 [今天, 今天+DUE_SOON_DAYS) 内，alert_today/alert_tomorrow 预警日期为今天/明天。
+    """
+    start, end = today.isoformat(), (today + timedelta(days=DUE_SOON_DAYS)).isoformat()
+    return {
+        'date': start,
+        'due_soon': [row['key'] for row in rows or () if row.get('delivery_day') and start <= row['delivery_day'] < end],
+        'alert_today': [row['key'] for row in alert_index.projects_on(today)],
+        'alert_tomorrow': [row['key'] for row in alert_index.projects_on(today + timedelta(days=1))]
+    }
+
+# 预警日期解析
+EXCEL_EPOCH = datetime(1899, 12, 30)  # Excel序列日期起点（1900日期系统）
+EXCEL_SERIAL_RANGE = (20000, 80000)  # 按Excel序列日期解析的数值范围（约1954~2119年）
+ALERT_DATE_EMPTY = {'', '待定', 'none', 'null', 'nan'}
+# 最常见的 2025.6.27 / 2025-06-27 / 2025/6/27 形式
+ALERT_DATE_FAST_PATTERN = re.compile(r'(\d{4})[\.\-\/](\d{1,2})[\.\-\/](\d{1,2})')
+ALERT_DATE_FORMATS = [
+    '%Y.%m.%d',    # 2025.06.24 / 2025.6.24
+    '%Y-%m-%d',    # 2025-06-24
+    '%Y/%m/%d',    # 2025/06/24
+    '%Y年%m月%d日', # 2025年06月24日
+    '%m/%d/%Y',    # 06/24/2025 (美国格式)
+    '%d/%m/%Y'     # 24/06/2025 (欧洲格式)
+]
+ALERT_DATE_PATTERNS = [
+    re.compile(r'(\d{4})[\.\-\/](\d{1,2})[\.\-\/](\d{1,2})'),  # 2025.06.24
+    re.compile(r'(\d{1,2})[\.\-\/](\d{1,2})[\.\-\/](\d{4})'),  # 24.06.2025
+    re.compile(r'(\d{4})年(\d{1,2})月(\d{1,2})日')             # 2025年06月24日
+]
+
+def parse_alert_date(value):
+    """
+    解析预警日期，返回date或None。
+    支持单元格中的datetime/date、Excel序列日期数值和各种格式的日期字符串。
+    """
+    # 单元格中常见的类型直接判断，不需要为此导入pandas/numpy
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return _parse_alert_date_text(value.strip())
+    if isinstance(value, datetime):
+        # NaT与自身不相等
+        return value.date() if value == value else None
+    if isinstance(value, date):
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        if value != value:  # NaN
+            return None
+        return _parse_alert_serial(value)
+    # 其他类型（numpy数值、pandas缺失值等）才使用pandas/numpy判断
+    if not isinstance(value, bool):
+        if pd.isna(value):
+            return None
+        if isinstance(value, np.number) and not isinstance(value, np.bool_):
+            return _parse_alert_serial(value)
+    return _parse_alert_date_text(str(value).strip())
+
+def _parse_alert_serial(value):
+    """Excel序列日期数值，超出 EXCEL_SERIAL_RANGE 的数值按文本解析"""
+    if EXCEL_SERIAL_RANGE[0] <= value <= EXCEL_SERIAL_RANGE[1]:
+        return (EXCEL_EPOCH + timedelta(days=float(value))).date()
+    return _parse_alert_date_text(str(value).strip())
+
+@lru_cache(maxsize=4096)
+def _parse_alert_date_text(date_str):
+    """按单元格文本解析日期，结果按原始文本缓存"""
+    if date_str.lower() in ALERT_DATE_EMPTY:
         return None
     
-    date_str = str(date_str).strip()
-    logging.debug(f"原始预警日期: {date_str}")
+    match = ALERT_DATE_FAST_PATTERN.fullmatch(date_str)
+    if match:
+        try:
+            return date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+        except ValueError:
+            pass
     
     # 尝试多种日期格式
-    formats = [
-        '%Y.%m.%d',    # 2025.06.24
-        '%Y-%m-%d',    # 2025-06-24
-        '%Y/%m/%d',    # 2025/06/24
-        '%Y年%m月%d日', # 2025年06月24日
-        '%Y.%m.%d',    # 2025.6.24 (带一位数月份)
-        '%m/%d/%Y',    # 06/24/2025 (美国格式)
-        '%d/%m/%Y'     # 24/06/2025 (欧洲格式)
-    ]
-    
-    for fmt in formats:
+    for fmt in ALERT_DATE_FORMATS:
         try:
-            # 尝试解析
-            parsed_date = datetime.strptime(date_str, fmt).date()
-            logging.debug(f"成功解析日期: {date_str} -> {parsed_date}")
-            return parsed_date
+            return datetime.strptime(date_str, fmt).date()
         except ValueError:
             continue
     
     # 尝试正则表达式匹配
-    patterns = [
-        r'(\d{4})[\.\-\/](\d{1,2})[\.\-\/](\d{1,2})',  # 2025.06.24
-        r'(\d{1,2})[\.\-\/](\d{1,2})[\.\-\/](\d{4})',  # 24.06.2025
-        r'(\d{4})年(\d{1,2})月(\d{1,2})日'             # 2025年06月24日
-    ]
-    
-    for pattern in patterns:
-        match = re.match(pattern, date_str)
+    for pattern in ALERT_DATE_PATTERNS:
+        match = pattern.match(date_str)
         if match:
             groups = match.groups()
             try:
-                if len(groups) == 3:
-                    # 处理不同格式
-                    if len(groups[0]) == 4:  # 年份在前
-                        year = int(groups[0])
-                        month = int(groups[1])
-                        day = int(groups[2])
-                    else:  # 日期在前
-                        day = int(groups[0])
-                        month = int(groups[1])
-                        year = int(groups[2])
-                    
-                    # 处理两位年份
-                    if year < 100:
-                        if year > 50:
-                            year += 1900
-                        else:
-                            year += 2000
-                    
-                    parsed_date = datetime(year, month, day).date()
-                    logging.debug(f"通过正则解析日期: {date_str} -> {parsed_date}")
-                    return parsed_date
+                # 处理不同格式
+                if len(groups[0]) == 4:  # 年份在前
+                    year = int(groups[0])
+                    month = int(groups[1])
+                    day = int(groups[2])
+                else:  # 日期在前
+                    day = int(groups[0])
+                    month = int(groups[1])
+                    year = int(groups[2])
+                
+                # 处理两位年份
+                if year < 100:
+                    if year > 50:
+                        year += 1900
+                    else:
+                        year += 2000
+                
+                return date(year, month, day)
             except Exception as e:
                 logging.error(f"日期解析错误: {date_str}, 错误: {str(e)}")
                 continue
@@ -284,81 +982,61 @@ def parse_alert_date(date_str):
     logging.error(f"无法解析日期: {date_str}")
     return None
 
-def should_trigger_alert(project, settings): 
-    alert_date = parse_alert_date(project['alert_date']) 
-    if not alert_date: 
-        return False 
-    
-    # 获取当前日期和时间 
-    today = datetime.now().date() 
-    now = datetime.now() 
-    
-    # 检查是否是提前一天预警（前一天）或当天预警（当天） 
-    alert_date_afternoon = alert_date - timedelta(days=1)  # 提前一天预警 
-    alert_date_morning = alert_date  # 当天预警 
-    
-    # 检查当前日期是否匹配（提前一天或当天） 
-    if today != alert_date_afternoon and today != alert_date_morning: 
-        return False 
+def parse_alert_dates(rows):
+    """入库时一次性解析所有项目的预警日期，返回 {项目key: date或None}"""
+    return {row['key']: parse_alert_date(row['alert_date']) for row in rows}
+
+@timed(CHECK_ALERTS_SECONDS)
+def check_alerts(alert_index, settings=None, now=None):
+    """检查需要预警的项目：到了预警时间点的 明天（提前一天）和 今天（当天）的项目"""
+    settings = settings or alert_settings
+    now = now or datetime.now()
+    today = now.date()
     
-    # 根据当前日期是提前一天还是当天，决定使用哪个预警时间段 
-    if today == alert_date_afternoon: 
-        # 提前一天预警，使用下午时间段 
-        alert_time_str = settings.get('afternoon_alert_time', '13:59') 
-    else: 
-        # 当天预警，使用上午时间段 
-        alert_time_str = settings.get('morning_alert_time', '00:00') 
+    candidates = []
+    for day, time_key, default_time in (
+        (today + timedelta(days=1), 'afternoon_alert_time', '13:59'),  # 提前一天预警，使用下午时间段
+        (today, 'morning_alert_time', '00:00')                          # 当天预警，使用上午时间段
+    ):
+        try:
+            # 如果当前时间在预警时间之后
+            if now >= alert_time_on(today, settings.get(time_key, default_time)):
+                candidates.extend(alert_index.projects_on(day))
+        except Exception as e:
+            logging.error(f"时间检查错误: {str(e)}")
     
-    try: 
-        alert_hour, alert_minute = map(int, alert_time_str.split(':')) 
-        # 创建预警时间对象 
-        alert_time = datetime( 
-            now.year, now.month, now.day, 
-            alert_hour, alert_minute 
-        ) 
-        
-        # 如果当前时间在预警时间之后 
-        return now >= alert_time 
-    except Exception as e: 
-        logging.error(f"时间检查错误: {str(e)}") 
-        return False 
-
-def check_alerts(project_data):
-    """检查需要预警的项目"""
     alerts = []
-    today = datetime.now().date()
-    
-    for project in project_data:
-        # 确保项目名称、预警日期和预警内容都不为空
+    for project in sorted(candidates, key=lambda project: project['id']):
         project_name = str(project['project_name']).strip()
         alert_date_str = str(project['alert_date']).strip()
         alert_content = str(project['alert_content']).strip()
         
-        # 检查关键字段是否为空
-        if not project_name or not alert_date_str or not alert_content:
-            continue
-            
-        if should_trigger_alert(project, alert_settings):
-            # 只收集有预警内容的项目
-            if alert_content and alert_content != "待定":
-                alert_data = {
-                    'id': project['id'],
-                    'project_name': project_name,
-                    'alert_content': alert_content,
-                    'alert_date': alert_date_str,
-                    'expiry_date': today.strftime("%Y-%m-%d")
-                }
-                alerts.append(alert_data)
-                logging.info(f"触发预警: {project['id']} - {project_name} - 预警日期: {alert_date_str}")
-            else:
-                logging.info(f"跳过预警（内容无效）: {project['id']} - {project_name} - 内容: {alert_content}")
+        # 只收集有预警内容的项目
+        if alert_content != "待定":
+            alert_data = {
+                'id': project['id'],
+                'project_name': project_name,
+                'alert_content': alert_content,
+                'alert_date': alert_date_str,
+                'expiry_date': today.strftime("%Y-%m-%d")
+            }
+            alerts.append(alert_data)
+            logging.info(f"触发预警: {project['id']} - {project_name} - 预警日期: {alert_date_str}")
+        else:
+            logging.info(f"跳过预警（内容无效）: {project['id']} - {project_name} - 内容: {alert_content}")
     
     return alerts
 
+@timed(UPDATE_ALERTS_SECONDS)
 def update_active_alerts(alerts):
-    """更新活跃预警列表"""
+    """
+    更新活跃预警列表，返回活跃预警数据列表。
+    created_at 只在预警新增或内容变化时更新，预警没有变化时不重写 alert_data.json。
+    """
     global active_alerts
     current_time = time.time()
+    expiry_date = datetime.now().date().strftime("%Y-%m-%d")
+    changed = False
     # 获取当前有效的预警ID
     current_alert_ids = {str(alert['id']) for alert in alerts}
 
@@ -367,61 +1045,741 @@ def update_active_alerts(alerts):
     for alert_id in expired_ids:
           logging.info(f"移除过期预警: {alert_id}")
           del active_alerts[alert_id]
+          changed = True
 
     # 添加新预警或更新已有预警
     for alert in alerts:
         alert_id = str(alert['id'])
-        # 如果已存在，则更新；否则添加
-        if alert_id in active_alerts:
-            # 更新预警数据
-            active_alerts[alert_id]['data'] = alert
-            active_alerts[alert_id]['created_at'] = current_time
-            active_alerts[alert_id]['expiry_date'] = datetime.now().date().strftime("%Y-%m-%d")
-            logging.info(f"更新预警: {alert['project_name']}")
+        existing = active_alerts.get(alert_id)
+        # 如果已存在，则只在内容或有效日期变化时更新；否则添加
+        if existing is not None:
+            if existing['data'] != alert:
+                existing['data'] = alert
+                existing['created_at'] = current_time
+                existing['expiry_date'] = expiry_date
+                changed = True
+                logging.info(f"更新预警: {alert['project_name']}")
+            elif existing.get('expiry_date') != expiry_date:
+                existing['expiry_date'] = expiry_date
+                changed = True
         else:
             active_alerts[alert_id] = {
                 'data': alert,
                 'created_at': current_time,
-                'expiry_date': datetime.now().date().strftime("%Y-%m-%d")
+                'expiry_date': expiry_date
             }
+            changed = True
             logging.info(f"添加新预警: {alert['project_name']}")
     
-    # 保存当前活跃预警
+    if changed:
+        # 后台保存当前活跃预警（复制一份，之后的修改不影响待写内容）
+        saved_alerts = [dict(alert) for alert in active_alerts.values()]
+        persistence_writer.submit(ALERT_DATA_PATH, lambda: dump_json(saved_alerts), '保存预警数据错误')
+    return [alert['data'] for alert in active_alerts.values()]
+
+def excel_signature(path=None):
+    """工作簿签名：修改时间和文件大小"""
+    stat = os.stat(path or EXCEL_FILE_PATH)
+    return stat.st_mtime_ns, stat.st_size
+
+def excel_content_hash(path=None):
+    """工作簿内容哈希"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path or EXCEL_FILE_PATH, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def load_parse_cache():
+    """
+    从磁盘读取各来源的解析结果 {(路径, 表规则): {'hash', 'sheets'}}，
+    格式版本与 PARSE_CACHE_VERSION 不同的缓存丢弃，重新解析工作簿。
+    """
     try:
-        with open(ALERT_DATA_PATH, 'w', encoding='utf-8') as f:
-            json.dump(list(active_alerts.values()), f, ensure_ascii=False, indent=4)
+        if os.path.exists(PARSE_CACHE_PATH):
+            with open(PARSE_CACHE_PATH, 'rb') as f:
+                cached = pickle.load(f)
+            if isinstance(cached, dict) and cached.get('version') == PARSE_CACHE_VERSION:
+                return cached['entries']
+            logging.info("解析缓存格式版本不同，重新解析工作簿")
     except Exception as e:
-        logging.error(f"保存预警数据错误: {str(e)}")
+        logging.warning(f"读取解析缓存失败: {str(e)}")
+    return {}
 
-def update_cache():
-    """更新缓存数据"""
-    current_time = time.time()
-    if current_time - data_cache['timestamp'] > CACHE_TIMEOUT or data_cache['data'] is None:
-        new_data, periods = safe_convert_excel()
-        if new_data is not None and periods is not None:
-            # 检查预警项目
-            alerts = check_alerts(new_data)
-            data_cache['alerts'] = alerts
-            
-            # 更新活跃预警
-            update_active_alerts(alerts)
-            
-            data_cache['data'] = new_data
-            data_cache['periods'] = periods
-            data_cache['timestamp'] = current_time
-            
-            # 异步保存到文件
-            try:
-                with open(JSON_OUTPUT_PATH, 'w', encoding='utf-8') as f:
-                    json.dump({
-                        'projects': new_data,
-                        'periods': periods,
-                        'alerts': alerts,
-                        'active_alerts': [alert['data'] for alert in active_alerts.values()]
-                    }, f, ensure_ascii=False, indent=4)
-            except Exception as e:
-                logging.error(f"保存JSON错误: {str(e)}")
-    return data_cache['data'], data_cache['periods'], data_cache['alerts']
+def save_parse_cache():
+    """后台保存各来源的解析结果到磁盘"""
+    entries = {source: {'hash': entry['hash'], 'sheets': entry['sheets']}
+               for source, entry in parse_cache.items() if entry['sheets'] is not None}
+    persistence_writer.submit(
+        PARSE_CACHE_PATH,
+        lambda: pickle.dumps({'version': PARSE_CACHE_VERSION, 'entries': entries},
+                             protocol=pickle.HIGHEST_PROTOCOL),
+        '保存解析缓存失败'
+    )
+
+LATEST_SHEET_PATTERN = re.compile(r'(\d{1,2})\.(\d{1,2})\s*[~～\-－至]')
+
+def latest_period_sheet(sheet_names, today=None):
+    """
+    周期最新的进度表：按表名中的周期起始日期（如 进度表（6.3~6.16） 为6月3日）选择。
+    表名不带年份，晚于今天半年以上的日期视为去年。没有带周期的表时返回第一张表。
+    """
+    today = today or date.today()
+    latest = None
+    for sheet_name in sheet_names:
+        match = LATEST_SHEET_PATTERN.search(sheet_name)
+        if not match:
+            continue
+        try:
+            start = date(today.year, int(match.group(1)), int(match.group(2)))
+        except ValueError:
+            continue
+        if start > today + timedelta(days=183):
+            start = start.replace(year=today.year - 1)
+        if latest is None or start > latest[0]:
+            latest = (start, sheet_name)
+    if latest is None:
+        return sheet_names[0] if sheet_names else None
+    return latest[1]
+
+def resolve_sheet_names(path, sheet_rule):
+    """按表规则得到要读取的表名：精确表名直接返回，通配符和None需要打开工作簿查看"""
+    if sheet_rule and not glob.has_magic(sheet_rule):
+        return [sheet_rule]
+    workbook = openpyxl.load_workbook(path, read_only=True, keep_links=False)
+    try:
+        sheet_names = workbook.sheetnames
+    finally:
+        workbook.close()
+    if sheet_rule is None:
+        return [latest_period_sheet(sheet_names)]
+    return [name for name in sheet_names if fnmatch.fnmatchcase(name, sheet_rule)]
+
+def workbook_sources():
+    """当前配置的所有来源 [(工作簿路径, 表规则)]，路径中的通配符在这里展开"""
+    configured = WORKBOOK_SOURCES or [{'path': EXCEL_FILE_PATH, 'sheet': EXCEL_SHEET_NAME}]
+    sources = []
+    for item in configured:
+        pattern = item['path']
+        paths = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        for path in paths:
+            # 排除Excel的锁文件 ~$xxx.xlsx
+            if not os.path.basename(path).startswith('~$'):
+                sources.append((path, item.get('sheet')))
+    return sources
+
+def parse_workbook_source(path, sheet_rule):
+    """
+    解析一个工作簿中按表规则选中的表，返回 [(表名, 项目数据, 周期信息)]，任一张表失败返回None。
+    多个工作簿需要解析时在进程池中运行。
+    """
+    try:
+        sheet_names = resolve_sheet_names(path, sheet_rule)
+    except Exception as e:
+        logging.error(f"Excel转换错误: {str(e)}")
+        return None
+    sheets = []
+    for sheet_name in sheet_names:
+        data, periods = safe_convert_excel(path, sheet_name)
+        if data is None or periods is None:
+            return None
+        sheets.append((sheet_name, data, periods))
+    return sheets
+
+def _parse_and_time(path, sheet_rule):
+    """返回 (解析结果, 耗时)；在解析进程中运行时由主进程记录耗时指标"""
+    start = time.perf_counter()
+    sheets = parse_workbook_source(path, sheet_rule)
+    return sheets, time.perf_counter() - start
+
+def parse_workbook_sources(sources):
+    """解析多个来源，返回 {来源: 解析结果}；多于一个时并行解析"""
+    global parse_pool
+    refresh_stats['parses'] += len(sources)
+    timed_results = None
+    if len(sources) > 1 and PARSE_WORKERS != 1:
+        try:
+            if parse_pool is None:
+                # spawn：不在有多个线程的进程中fork
+                parse_pool = ProcessPoolExecutor(max_workers=PARSE_WORKERS or None,
+                                                 mp_context=multiprocessing.get_context('spawn'))
+            futures = {source: parse_pool.submit(_parse_and_time, *source) for source in sources}
+            timed_results = {source: future.result() for source, future in futures.items()}
+        except Exception as e:
+            logging.warning(f"进程池解析失败: {str(e)}，改为逐个解析")
+            parse_pool = None
+    if timed_results is None:
+        timed_results = {source: _parse_and_time(*source) for source in sources}
+
+    results = {}
+    for source, (sheets, seconds) in timed_results.items():
+        EXCEL_PARSE_SECONDS.observe(seconds)
+        if sheets is None:
+            EXCEL_PARSE_FAILURES.inc()
+        results[source] = sheets
+    return results
+
+def workbook_label(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+def source_label(path, sheet_name):
+    return f"{workbook_label(path)}/{sheet_name}"
+
+def merge_workbook_parts(parts):
+    """
+    合并各来源的数据：id重新按顺序编号，每个项目记录 source；周期信息取第一个来源。
+    只有一个来源且未配置 WORKBOOK_SOURCES 时原样返回，数据格式与单工作簿时相同。
+    """
+    sources = []
+    for (path, _), sheets in parts:
+        for sheet_name, rows, periods in sheets:
+            sources.append({'source': source_label(path, sheet_name), 'path': path, 'sheet': sheet_name,
+                            'rows': len(rows), 'periods': periods})
+    if not sources:
+        return None, None, ()
+    if WORKBOOK_SOURCES is None and len(parts) == 1 and len(parts[0][1]) == 1:
+        _, data, periods = parts[0][1][0]
+        return assign_project_keys(data), periods, tuple(sources)
+
+    # 解析缓存中的行不修改，合并时复制（旧快照仍引用它们）
+    data = []
+    key_sources = []
+    for (path, _), sheets in parts:
+        for sheet_name, rows, _ in sheets:
+            label = source_label(path, sheet_name)
+            # 项目key只按工作簿区分：表规则每次只选中一张表（周期最新的表）时，换成新周期的表key不变；
+            # 同一规则同时选中多张表时才按表名区分
+            key_source = label if len(sheets) > 1 else workbook_label(path)
+            for row in rows:
+                data.append(row.copy(id=len(data) + 1, source=label))
+                key_sources.append(key_source)
+    return assign_project_keys(data, key_sources), sources[0]['periods'], tuple(sources)
+
+def load_workbook_data():
+    """
+    读取所有来源的工作簿数据并合并，只有内容真正变化的工作簿才调用 safe_convert_excel：
+    签名未变直接使用上次结果；签名变了但内容哈希相同（如只是重新保存）也不重新解析。
+    某个工作簿读取失败时继续使用它上次的结果。返回 (项目数据, 周期信息, 来源列表)。
+    """
+    if not parse_cache:
+        # 冷启动：载入磁盘解析缓存，内容哈希一致的工作簿不需要解析
+        for source, entry in load_parse_cache().items():
+            sheets = [(sheet_name, compact_rows(derive_display_fields(rows)), periods)
+                      for sheet_name, rows, periods in entry['sheets']]
+            parse_cache[source] = {'signature': None, 'hash': entry['hash'], 'sheets': sheets}
+
+    sources = workbook_sources()
+    pending = {}
+    for source in sources:
+        entry = parse_cache.get(source)
+        try:
+            signature = excel_signature(source[0])
+            if entry is not None and signature == entry['signature']:
+                PARSE_CACHE_LOOKUPS.inc(result='hit')
+                continue
+            content_hash = excel_content_hash(source[0])
+        except OSError as e:
+            logging.error(f"Excel转换错误: {str(e)}")
+            continue
+        if entry is not None and content_hash == entry['hash']:
+            logging.debug(f'Excel内容未变化，跳过解析: {source[0]}')
+            PARSE_CACHE_LOOKUPS.inc(result='hit')
+            entry['signature'] = signature
+            continue
+        PARSE_CACHE_LOOKUPS.inc(result='miss')
+        pending[source] = (signature, content_hash)
+
+    if pending:
+        results = parse_workbook_sources(list(pending))
+        for source, sheets in results.items():
+            if sheets is None:
+                continue
+            signature, content_hash = pending[source]
+            sheets = [(sheet_name, compact_rows(derive_display_fields(rows)), periods)
+                      for sheet_name, rows, periods in sheets]
+            parse_cache[source] = {'signature': signature, 'hash': content_hash, 'sheets': sheets}
+        save_parse_cache()
+
+    parts = [(source, parse_cache[source]['sheets']) for source in sources
+             if source in parse_cache and parse_cache[source]['signature'] is not None]
+    previous_parts = merged_workbooks['parts']
+    unchanged = previous_parts is not None and len(previous_parts) == len(parts) and all(
+        source == previous_source and sheets is previous_sheets
+        for (source, sheets), (previous_source, previous_sheets) in zip(parts, previous_parts))
+    if not unchanged:
+        data, periods, merged_sources = merge_workbook_parts(parts)
+        if data is None:
+            return None, None, ()
+        merged_workbooks.update(parts=parts, data=data, periods=periods, sources=merged_sources)
+    return merged_workbooks['data'], merged_workbooks['periods'], merged_workbooks['sources']
+
+def assign_project_keys(rows, key_sources=None):
+    """
+    为每个项目生成稳定的key（单位+项目名称+产品），不随行号变化。
+    key_sources: 合并多个来源时与 rows 一一对应的来源标识，不同来源的同名项目互不影响。
+    完全相同的行按出现顺序加后缀区分。
+    """
+    seen = {}
+    for position, row in enumerate(rows):
+        identity = '\x1f'.join(str(row[col]) for col in ('client', 'project_name', 'product_name'))
+        if key_sources is not None:
+            identity = f"{key_sources[position]}\x1f{identity}"
+        base = hashlib.blake2b(identity.encode('utf-8'), digest_size=6).hexdigest()
+        count = seen.get(base, 0)
+        seen[base] = count + 1
+        row['key'] = base if count == 0 else f'{base}-{count}'
+    return rows
+
+# 重复出现的文本列：同一个值在各行、各工作簿和各代数据之间只保留一个字符串对象，各行只保存引用
+INTERNED_COLUMNS = ('client', 'product_name', 'classification', 'delivery_date', 'responsible',
+                    'workshop_progress', 'alert_date', 'alert_content', 'source')
+
+def compact_rows(rows):
+    """
+    返回紧凑存储的项目列表：字典（预热文件、旧版解析缓存）转换为 ProjectRow，
+    并按值驻留（sys.intern）重复的文本列，相当于对单位、船级、负责人等列做字典编码。
+    解析进程传回的结果和磁盘缓存读出的数据都是新对象，放入解析缓存前调用一次。
+    """
+    compacted = []
+    for row in rows:
+        if not isinstance(row, ProjectRow):
+            row = ProjectRow(row)
+        for column in INTERNED_COLUMNS:
+            value = getattr(row, column, None)
+            if type(value) is str:
+                setattr(row, column, sys.intern(value))
+        compacted.append(row)
+    return compacted
+
+def share_unchanged_rows(old_rows, new_rows):
+    """
+    新一代数据中内容与上一代相同（按key对应）的项目改用上一代的数据，新旧快照同时存在时未变的项目也只有一份；
+    返回共享的行数。id也相同时直接使用上一代的行对象；上方插入或删除行只改变了id时，
+    用上一代的各字段值建一个新行，旧快照已经发布，它的行对象不能修改。
+    """
+    if not old_rows:
+        return 0
+    old_by_key = {row['key']: row for row in old_rows}
+    shared = 0
+    for position, row in enumerate(new_rows):
+        old = old_by_key.get(row['key'])
+        if old is not None and old is not row and old.content() == row.content():
+            new_rows[position] = old if old.id == row.id else old.copy(id=row.id)
+            shared += 1
+    return shared
+
+def diff_project_rows(old_rows, new_rows):
+    """
+    按项目key比较新旧数据，返回 (变化列表, 顺序是否变化)。
+    变化列表元素为 (操作, key, 项目)，操作为 added/changed/removed；
+    只比较内容，不比较按位置编号的id。
+    """
+    old_by_key = {row['key']: row for row in old_rows}
+    changes = []
+    for row in new_rows:
+        old = old_by_key.pop(row['key'], None)
+        if old is None:
+            changes.append(('added', row['key'], row))
+        elif old is not row and any(old.get(col) != row[col] for col in PROJECT_COLUMNS[1:]):
+            changes.append(('changed', row['key'], row))
+    for key in old_by_key:
+        changes.append(('removed', key, None))
+    order_changed = len(old_rows) != len(new_rows) or \
+        any(old['key'] != new['key'] for old, new in zip(old_rows, new_rows))
+    return changes, order_changed
+
+def record_data_changes(previous, new_rows):
+    """比较上一代快照与新数据，返回 (版本, 增量历史)，有变化时版本号加1"""
+    if previous.data is None:
+        # 首次加载，没有可比较的基准
+        return previous.version + 1, ()
+    changes, order_changed = diff_project_rows(previous.data, new_rows)
+    if not changes and not order_changed:
+        return previous.version, previous.deltas
+    version = previous.version + 1
+    logging.info(f"项目数据变化: {len(changes)} 行，版本 {version}")
+    deltas = previous.deltas + ((version, changes, order_changed),)
+    return version, deltas[-DELTA_HISTORY_SIZE:]
+
+HISTORY_COLUMNS = ('drawing', 'software', 'simulation', 'listing', 'workshop_progress')
+
+def _history_value(value):
+    if isinstance(value, (int, float, str)):
+        return value
+    return str(value)
+
+class HistoryStore:
+    """
+    进度历史（只追加）：每代数据只记录进度有变化的项目。
+    generations 每个数据版本一行，记录时间和当时的进度周期；
+    changes 按 (项目key, 版本) 存变化后的值，按项目和时间查询都走主键。
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS generations (
+            version INTEGER PRIMARY KEY,
+            recorded_at REAL NOT NULL,
+            progress_period TEXT,
+            last_period TEXT
+        );
+        CREATE INDEX IF NOT EXISTS generations_recorded_at ON generations (recorded_at);
+        CREATE TABLE IF NOT EXISTS changes (
+            key TEXT NOT NULL,
+            version INTEGER NOT NULL,
+            removed INTEGER NOT NULL DEFAULT 0,
+            drawing INTEGER,
+            software INTEGER,
+            simulation INTEGER,
+            listing INTEGER,
+            workshop_progress TEXT,
+            PRIMARY KEY (key, version)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS projects (
+            key TEXT PRIMARY KEY,
+            client TEXT,
+            project_name TEXT,
+            product_name TEXT,
+            source TEXT
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+        # 项目key -> 最近记录的值，已删除的项目为None；第一次 record 时才从数据库载入，
+        # 只查询的进程（多进程部署的工作进程）不需要扫描全部历史
+        self._latest = None
+
+    def _connect(self):
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(self.SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def _load_latest(self, conn):
+        """各项目最近记录的值，record 用来判断进度是否有变化"""
+        latest = {}
+        columns = ', '.join(f'c.{column}' for column in HISTORY_COLUMNS)
+        for key, removed, *values in conn.execute(f"""
+                SELECT c.key, c.removed, {columns} FROM changes c
+                JOIN (SELECT key, MAX(version) AS version FROM changes GROUP BY key) latest
+                ON c.key = latest.key AND c.version = latest.version"""):
+            latest[key] = None if removed else tuple(values)
+        return latest
+
+    def record(self, version, rows, periods, recorded_at, changes=None):
+        """
+        记录一代数据中进度有变化的项目，返回记录的行数。
+        changes 为 diff_project_rows 的结果时只检查变化的行，否则与上次记录的值逐行比较。
+        """
+        with self._lock:
+            conn = self._connect()
+            if self._latest is None:
+                self._latest = self._load_latest(conn)
+            if changes is None:
+                current = {row['key']: row for row in rows}
+                changes = [('added', key, row) for key, row in current.items()]
+                changes += [('removed', key, None) for key, values in self._latest.items()
+                            if values is not None and key not in current]
+            records = []
+            projects = []
+            for _, key, row in changes:
+                if row is None:
+                    if self._latest.get(key) is not None:
+                        records.append((key, version, 1) + (None,) * len(HISTORY_COLUMNS))
+                        self._latest[key] = None
+                    continue
+                values = tuple(_history_value(row[column]) for column in HISTORY_COLUMNS)
+                if self._latest.get(key) == values:
+                    continue
+                if key not in self._latest:
+                    projects.append((key, str(row['client']), str(row['project_name']),
+                                     str(row['product_name']), row.get('source')))
+                records.append((key, version, 0) + values)
+                self._latest[key] = values
+            if not records:
+                return 0
+            with conn:
+                conn.execute('INSERT OR REPLACE INTO generations VALUES (?, ?, ?, ?)',
+                             (version, recorded_at, periods.get('progress_period'), periods.get('last_period')))
+                conn.executemany(f'INSERT OR REPLACE INTO changes VALUES ({", ".join("?" * (3 + len(HISTORY_COLUMNS)))})',
+                                 records)
+                conn.executemany('INSERT OR IGNORE INTO projects VALUES (?, ?, ?, ?, ?)', projects)
+            return len(records)
+
+    def query(self, keys=None, start=None, end=None):
+        """
+        查询项目进度的时间序列 {项目key: {'project': 项目信息, 'series': [记录]}}，按时间排序。
+        start/end 为时间戳，先换算成版本范围，再按 (key, version) 主键查找。
+        指定 start 时另外返回每个项目在 start 之前的最后一条记录（baseline 为 True），
+        时间段内没有变化的项目也有当时的值，按周期比较时有基准。
+        既不指定项目也不指定时间范围时只查询最近 HISTORY_DEFAULT_DAYS 天。
+        """
+        if not keys and start is None and end is None:
+            start = time.time() - HISTORY_DEFAULT_DAYS * 86400
+        with self._lock:
+            conn = self._connect()
+            first = last = None
+            if start is not None:
+                first = conn.execute('SELECT MIN(version) FROM generations WHERE recorded_at >= ?', (start,)).fetchone()[0]
+                if first is None:
+                    # start 之后没有新记录，只返回各项目当时的值
+                    first = (conn.execute('SELECT MAX(version) FROM generations').fetchone()[0] or 0) + 1
+            if end is not None:
+                last = conn.execute('SELECT MAX(version) FROM generations WHERE recorded_at <= ?', (end,)).fetchone()[0]
+                if last is None:
+                    return {}
+            key_list = ', '.join('?' * len(keys)) if keys else None
+            conditions, params = [], []
+            if first is not None:
+                conditions.append('c.version >= ?')
+                params.append(first)
+            if last is not None:
+                conditions.append('c.version <= ?')
+                params.append(last)
+            if keys:
+                conditions.append(f'c.key IN ({key_list})')
+                params.extend(keys)
+            where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+            columns = ', '.join(f'c.{column}' for column in HISTORY_COLUMNS)
+            select = f"""
+                SELECT c.key, g.recorded_at, c.version, c.removed, {columns}, g.progress_period, g.last_period
+                FROM changes c JOIN generations g ON g.version = c.version"""
+            rows = conn.execute(f'{select} {where} ORDER BY c.key, c.version', params).fetchall()
+            baselines = []
+            if first is not None:
+                before = first if last is None else min(first, last + 1)
+                key_filter = f'AND key IN ({key_list})' if keys else ''
+                baselines = conn.execute(f"""{select}
+                    JOIN (SELECT key, MAX(version) AS version FROM changes WHERE version < ? {key_filter} GROUP BY key) b
+                    ON c.key = b.key AND c.version = b.version""", [before] + list(keys or ())).fetchall()
+                # 时间段之前已删除、之后也没有记录的项目不返回
+                changed_keys = {row[0] for row in rows}
+                baselines = [row for row in baselines if not row[3] or row[0] in changed_keys]
+            found = sorted({row[0] for row in rows} | {row[0] for row in baselines})
+            projects = {}
+            for offset in range(0, len(found), 500):
+                chunk = found[offset:offset + 500]
+                for key, client, project_name, product_name, source in conn.execute(
+                        f'SELECT * FROM projects WHERE key IN ({", ".join("?" * len(chunk))})', chunk):
+                    projects[key] = {'client': client, 'project_name': project_name,
+                                     'product_name': product_name, 'source': source}
+
+        result = {key: {'project': projects.get(key), 'series': []} for key in found}
+        for baseline, records in ((True, baselines), (False, rows)):
+            for key, recorded_at, version, removed, *rest in records:
+                values, (progress_period, last_period) = rest[:len(HISTORY_COLUMNS)], rest[len(HISTORY_COLUMNS):]
+                point = {'time': recorded_at, 'version': version, 'removed': bool(removed),
+                         'progress_period': progress_period, 'last_period': last_period}
+                point.update(zip(HISTORY_COLUMNS, values))
+                if baseline:
+                    point['baseline'] = True
+                result[key]['series'].append(point)
+        return result
+
+def summarize_periods(series):
+    """
+    按进度周期汇总时间序列：每个周期取最后一次记录的值，并与上一周期比较。
+    周期即各代数据解析出的 progress_period，上一周期对应表格中的 last_period。
+    """
+    periods = []
+    for point in series:
+        values = {column: point[column] for column in HISTORY_COLUMNS}
+        if periods and periods[-1]['progress_period'] == point['progress_period']:
+            periods[-1].update(values, removed=point['removed'])
+        else:
+            periods.append(dict(values, progress_period=point['progress_period'],
+                                last_period=point['last_period'], removed=point['removed']))
+    previous = None
+    for period in periods:
+        delta = None
+        if previous is not None and not period['removed'] and not previous['removed']:
+            delta = {column: period[column] - previous[column] for column in PERCENT_COLUMNS
+                     if isinstance(period[column], (int, float)) and isinstance(previous[column], (int, float))}
+            if period['workshop_progress'] != previous['workshop_progress']:
+                delta['workshop_progress'] = [previous['workshop_progress'], period['workshop_progress']]
+        period['delta'] = delta
+        previous = period
+    return periods
+
+history_store = HistoryStore(HISTORY_DB_PATH) if HISTORY_DB_PATH else None
+
+def build_delta(snapshot, since):
+    """
+    合并快照中 since 之后的所有增量。
+    since 太旧（不在增量历史中）或不合法时返回None，由调用方返回全量数据。
+    """
+    version = snapshot.version
+    if since == version:
+        return {'added': [], 'changed': [], 'removed': [], 'order': None}
+    if since > version or not snapshot.deltas or since < snapshot.deltas[0][0] - 1:
+        return None
+
+    first_op = {}
+    final = {}
+    order_changed = False
+    for entry_version, changes, entry_order_changed in snapshot.deltas:
+        if entry_version <= since:
+            continue
+        order_changed = order_changed or entry_order_changed
+        for op, key, row in changes:
+            first_op.setdefault(key, op)
+            final[key] = row
+
+    delta = {'added': [], 'changed': [], 'removed': [], 'order': None}
+    for key, row in final.items():
+        existed = first_op[key] != 'added'
+        if row is None:
+            if existed:
+                delta['removed'].append(key)
+        elif existed:
+            delta['changed'].append(row)
+        else:
+            delta['added'].append(row)
+    if order_changed:
+        delta['order'] = [row['key'] for row in snapshot.data]
+    return delta
+
+FILTER_COLUMNS = ('client', 'classification', 'responsible', 'workshop_progress', 'source')
+RESPONSIBLE_SEPARATORS = re.compile(r'[/、,，\s]+')
+
+def build_filter_index(rows):
+    """
+    每代数据建一次筛选索引 {字段: {值: [行号]}}，行号按表格顺序排列。
+    负责人一栏常写多个人（如 郭武彬/陈舟），除整栏外也按单个姓名索引。
+    """
+    index = {column: {} for column in FILTER_COLUMNS}
+    for position, row in enumerate(rows):
+        for column in FILTER_COLUMNS:
+            if column not in row:
+                continue
+            value = str(row[column]).strip()
+            values = {value}
+            if column == 'responsible':
+                values.update(name for name in RESPONSIBLE_SEPARATORS.split(value) if name)
+            for item in values:
+                index[column].setdefault(item, []).append(position)
+    return index
+
+def _refresh_snapshot():
+    """重新读取工作簿、检查预警并发布新快照，调用方必须持有 refresh_lock"""
+    global current_snapshot, last_refresh
+    previous = current_snapshot
+    new_data, periods, sources = load_workbook_data()
+    if new_data is None or periods is None:
+        return previous
+
+    if new_data is not previous.data and previous.data is not None:
+        # 未变的项目沿用上一代的行对象，之后建索引和比较都基于共享后的数据
+        shared = share_unchanged_rows(previous.data, new_data)
+        logging.debug(f"沿用上一代项目数据: {shared}/{len(new_data)} 行")
+
+    # 预警日期只在数据变化时解析一次并建立索引
+    if new_data is previous.data:
+        alert_index = previous.alert_index
+        filter_index = previous.filter_index
+    else:
+        alert_index = AlertIndex(new_data, parse_alert_dates(new_data))
+        filter_index = build_filter_index(new_data)
+    
+    # 与日期有关的显示标记：数据或日期变化时重新计算
+    today = date.today()
+    if new_data is previous.data and previous.display.get('date') == today.isoformat():
+        display = previous.display
+    else:
+        display = build_display_flags(new_data, alert_index, today)
+        if display == previous.display:
+            display = previous.display
+    
+    # 检查预警项目（与上一代相同时沿用旧列表）
+    alerts = check_alerts(alert_index)
+    if alerts == previous.alerts:
+        alerts = previous.alerts
+    
+    # 更新活跃预警
+    active_alerts_list = update_active_alerts(alerts)
+    
+    # 内容未变时解析缓存返回同一个列表，无需比较
+    version, deltas = previous.version, previous.deltas
+    if new_data is not previous.data:
+        version, deltas = record_data_changes(previous, new_data)
+    last_refresh = time.time()
+    
+    settings = alert_settings
+    if (version == previous.version and periods == previous.periods and alerts == previous.alerts
+            and active_alerts_list == previous.active_alerts and settings == previous.alert_settings
+            and display is previous.display and sources == previous.sources and not previous.warm):
+        # 内容没有变化，继续使用旧快照及其已序列化的响应
+        return previous
+    
+    snapshot = CacheSnapshot(
+        data=new_data,
+        periods=periods,
+        alerts=alerts,
+        active_alerts=active_alerts_list,
+        alert_settings=settings,
+        alert_index=alert_index,
+        filter_index=filter_index,
+        sources=sources,
+        version=version,
+        deltas=deltas,
+        display=display,
+        generated_at=time.time()
+    )
+    current_snapshot = snapshot
+    if process_role == 'leader':
+        publish_shared_snapshot(snapshot)
+    
+    # 记录进度历史（只记录有变化的项目）
+    if history_store is not None and (version != previous.version or previous.data is None):
+        try:
+            changes = deltas[-1][1] if deltas and deltas[-1][0] == version else None
+            history_store.record(version, new_data, periods, snapshot.generated_at, changes)
+        except Exception as e:
+            logging.error(f"记录进度历史失败: {str(e)}")
+    
+    # 预警日期有变化时只调整受影响的预警任务
+    if alert_index is not previous.alert_index:
+        sync_alert_jobs(alert_index)
+    
+    # 异步保存到文件（内容未变化时不会重写）
+    persistence_writer.submit(JSON_OUTPUT_PATH, lambda: dump_json({
+        'projects': new_data,
+        'periods': periods,
+        'alerts': alerts,
+        'active_alerts': active_alerts_list
+    }), '保存JSON错误')
+    
+    # 新快照发布后再通知SSE订阅者（跨天后显示标记变化时也通知前端重新获取）
+    if version != previous.version or display is not previous.display:
+        event_broker.publish('data-changed', {'version': version, 'date': display.get('date')})
+    if {str(alert['id']) for alert in active_alerts_list} != {str(alert['id']) for alert in previous.active_alerts}:
+        event_broker.publish('alerts-changed', {'count': len(active_alerts_list)})
+    return snapshot
+
+def update_cache(force=False):
+    """
+    更新缓存数据，返回当前快照。force为True时忽略缓存时间立即刷新（工作簿内容未变时仍不会重新解析）。
+    同一时间只有一个线程刷新：非强制刷新遇到正在进行的刷新时直接返回旧快照，
+    没有旧快照（首次加载）时等待刷新完成；强制刷新等待正在进行的刷新结束后再刷新一次。
+    """
+    snapshot = current_snapshot
+    if process_role == 'worker':
+        # 工作进程不解析，只使用领导进程发布的快照
+        return snapshot
+    if not force and snapshot.data is not None and time.time() - last_refresh <= CACHE_TIMEOUT:
+        return snapshot
+    if not refresh_lock.acquire(blocking=force or snapshot.data is None):
+        return snapshot
+    try:
+        # 等锁期间其它线程可能已经刷新完成
+        if not force and current_snapshot.data is not None and time.time() - last_refresh <= CACHE_TIMEOUT:
+            return current_snapshot
+        return _refresh_snapshot()
+    finally:
+        refresh_lock.release()
 
 def load_active_alerts():
     """从文件加载活跃预警"""
@@ -430,61 +1788,441 @@ def load_active_alerts():
         if os.path.exists(ALERT_DATA_PATH):
             with open(ALERT_DATA_PATH, 'r', encoding='utf-8') as f:
                 alerts = json.load(f)
+            with refresh_lock:
                 for alert in alerts:
                     alert_id = str(alert['data']['id'])
                     active_alerts[alert_id] = alert
-                logging.info(f"已加载 {len(active_alerts)} 条活跃预警")
+            logging.info(f"已加载 {len(active_alerts)} 条活跃预警")
     except Exception as e:
         logging.error(f"加载预警数据错误: {str(e)}")
 
+# Flask序列化日期单元格的格式（如 Thu, 03 Jul 2025 00:00:00 GMT）
+HTTP_DATE_PATTERN = re.compile(r'[A-Z][a-z]{2}, \d{2} [A-Z][a-z]{2} \d{4} \d{2}:\d{2}:\d{2} GMT')
+
+@lru_cache(maxsize=4096)
+def _parse_http_date(value):
+    return datetime.strptime(value, '%a, %d %b %Y %H:%M:%S GMT')
+
+def restore_cell_dates(rows):
+    """把保存时序列化成文本的日期单元格还原为datetime，与重新解析得到的数据一致"""
+    for row in rows:
+        for column, value in row.items():
+            if type(value) is str and value.endswith(' GMT') and HTTP_DATE_PATTERN.fullmatch(value):
+                row[column] = _parse_http_date(value)
+    return rows
+
+def load_warm_snapshot():
+    """
+    预热启动：用上次保存的 progress_data.json 构造快照，不导入pandas、不打开工作簿，
+    启动后立即可以提供数据；首次解析完成后按普通增量替换。没有可用的文件时返回None。
+    """
+    try:
+        with open(JSON_OUTPUT_PATH, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        rows = saved['projects']
+        periods = saved['periods']
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logging.info(f"没有可用的上次数据，等待首次解析: {str(e)}")
+        return None
+    if not rows or not periods:
+        return None
+    restore_cell_dates(rows)
+    if any('key' not in row for row in rows):
+        assign_project_keys(rows)
+    rows = compact_rows(derive_display_fields(rows))
+    alert_index = AlertIndex(rows, parse_alert_dates(rows))
+    with refresh_lock:
+        active_alerts_list = [alert['data'] for alert in active_alerts.values()]
+    return CacheSnapshot(
+        data=rows,
+        periods=periods,
+        alerts=saved.get('alerts') or [],
+        active_alerts=active_alerts_list,
+        alert_settings=alert_settings,
+        alert_index=alert_index,
+        filter_index=build_filter_index(rows),
+        version=current_snapshot.version,
+        display=build_display_flags(rows, alert_index, date.today()),
+        generated_at=time.time(),
+        warm=True
+    )
+
+def warm_start():
+    """发布上次的快照（有的话），在后台线程中进行首次解析"""
+    global current_snapshot, last_refresh
+    snapshot = load_warm_snapshot()
+    if snapshot is not None:
+        current_snapshot = snapshot
+        # 缓存时间内的请求直接使用该快照，不会在请求线程中抢先解析
+        last_refresh = time.time()
+        logging.info(f"预热启动: 使用上次保存的 {len(snapshot.data)} 个项目，后台解析工作簿")
+        if process_role == 'leader':
+            # 先发布给工作进程，首次解析完成后 _refresh_snapshot 再发布新快照
+            publish_shared_snapshot(snapshot)
+    threading.Thread(target=update_cache, kwargs={'force': True}, name='first-refresh', daemon=True).start()
+    return snapshot
+
+class RefreshWorker:
+    """
+    后台刷新线程：合并短时间内的多次文件事件（Excel保存一次会触发多个事件），
+    等文件大小和修改时间稳定、可以打开后，只调用一次 update_cache。
+    """
+    def __init__(self, debounce=REFRESH_DEBOUNCE, stable_time=REFRESH_STABLE_TIME, max_wait=REFRESH_MAX_WAIT):
+        self.debounce = debounce
+        self.stable_time = stable_time
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._last_event = 0
+        self._paths = set()  # 收到事件的工作簿
+        self._thread = None
+
+    def notify(self, path=None):
+        """收到文件事件，只记录时间和文件，不在watchdog线程中解析"""
+        with self._lock:
+            refresh_stats['events'] += 1
+            self._last_event = time.monotonic()
+            self._paths.add(path or EXCEL_FILE_PATH)
+        self._wakeup.set()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='excel-refresh', daemon=True)
+            self._thread.start()
+        return self
+
+    def _wait_quiet(self):
+        """防抖：直到最后一次事件后 debounce 秒内没有新事件"""
+        while True:
+            with self._lock:
+                remaining = self.debounce - (time.monotonic() - self._last_event)
+            if remaining <= 0:
+                return
+            time.sleep(remaining)
+
+    def _wait_stable(self, paths):
+        """等待文件写完：各文件签名在 stable_time 内不变且文件可以打开"""
+        deadline = time.monotonic() + self.max_wait
+        previous = None
+        while time.monotonic() < deadline:
+            try:
+                signature = []
+                for path in paths:
+                    signature.append(excel_signature(path))
+                    with open(path, 'rb') as f:
+                        f.read(1)
+            except OSError:
+                signature = None
+            if signature is not None and signature == previous:
+                return True
+            previous = signature
+            time.sleep(self.stable_time)
+        logging.warning(f"等待Excel文件保存完成超时({self.max_wait}秒)，仍尝试刷新")
+        return False
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            self._wait_quiet()
+            with self._lock:
+                paths, self._paths = sorted(self._paths), set()
+            self._wait_stable(paths)
+            start = time.perf_counter()
+            try:
+                update_cache(force=True)
+            except Exception as e:
+                logging.error(f"后台刷新缓存错误: {str(e)}")
+            refresh_stats['refreshes'] += 1
+            refresh_stats['last_refresh_duration'] = time.perf_counter() - start
+            logging.info(f"后台刷新完成: 文件事件 {refresh_stats['events']} 次，刷新 {refresh_stats['refreshes']} 次，"
+                         f"解析 {refresh_stats['parses']} 次")
+
+refresh_worker = RefreshWorker()
+
+def watched_patterns():
+    """需要监听的工作簿 [(目录, 文件名模式)]"""
+    configured = WORKBOOK_SOURCES or [{'path': EXCEL_FILE_PATH}]
+    return [(os.path.normcase(os.path.dirname(os.path.abspath(item['path']))), os.path.basename(item['path']))
+            for item in configured]
+
 class ExcelFileHandler(FileSystemEventHandler):
+    def _is_excel_file(self, path):
+        # 按文件名（或通配符）匹配，排除Excel的锁文件 ~$计划安排进度表.xlsx
+        name = os.path.basename(path)
+        if name.startswith('~$'):
+            return False
+        directory = os.path.normcase(os.path.dirname(os.path.abspath(path)))
+        return any(directory == watched_dir and fnmatch.fnmatch(name, pattern)
+                   for watched_dir, pattern in watched_patterns())
+
     def on_modified(self, event):
-        if event.src_path.endswith(EXCEL_FILE_PATH):
-            logging.info("Excel文件已修改，更新缓存")
-            update_cache()
+        if self._is_excel_file(event.src_path):
+            logging.info(f"Excel文件已修改，等待后台刷新缓存: {event.src_path}")
+            refresh_worker.notify(event.src_path)
             # 不再调用trigger_alert，避免Excel一保存就语音播报
 
+    def on_created(self, event):
+        self.on_modified(event)
+
+    def on_moved(self, event):
+        # Excel保存时先写临时文件再重命名为目标文件
+        if self._is_excel_file(event.dest_path):
+            logging.info(f"Excel文件已替换，等待后台刷新缓存: {event.dest_path}")
+            refresh_worker.notify(event.dest_path)
+
+def encode_response(payload):
+    """序列化响应并预先压缩，返回 {编码: (响应体, ETag)}"""
+    body = app.json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return compress_variants(body)
+
+def compress_variants(body):
+    """预先压缩响应体，返回 {编码: (响应体, ETag)}"""
+    etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+    variants = {'identity': (body, etag)}
+    if len(body) >= COMPRESS_MIN_SIZE:
+        variants['gzip'] = (gzip.compress(body, 6), f'{etag}-gzip')
+        if brotli is not None:
+            variants['br'] = (brotli.compress(body), f'{etag}-br')
+    return variants
+
+def conditional_response(variants, mimetype='application/json', cache_control='no-cache', last_modified=None):
+    """
+    按Accept-Encoding选择预压缩的响应体，If-None-Match命中时返回304；
+    请求不带If-None-Match时按If-Modified-Since判断（需要提供 last_modified）。
+    默认允许浏览器缓存，但每次都要向服务器验证。
+    """
+    encoding = 'identity'
+    for candidate in ('br', 'gzip'):
+        if candidate in variants and request.accept_encodings[candidate]:
+            encoding = candidate
+            break
+    body, etag = variants[encoding]
+    if request.if_none_match:
+        not_modified = request.if_none_match.contains(etag)
+    else:
+        not_modified = last_modified is not None and request.if_modified_since is not None and \
+            int(last_modified) <= request.if_modified_since.timestamp()
+    if not_modified:
+        response = Response(status=304)
+    else:
+        # 多进程部署时共享响应体是映射文件的memoryview，只在返回200时复制
+        response = Response(body if isinstance(body, bytes) else bytes(body), mimetype=mimetype)
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = int(last_modified)
+    response.headers['Cache-Control'] = cache_control
+    response.vary.add('Accept-Encoding')
+    return response
+
+ROW_FIELDS = PROJECT_COLUMNS + DISPLAY_FIELDS + ['key', 'source']
+
+def parse_data_query(args):
+    """
+    解析 /api/data 的查询参数，返回 (since, fields, offset, limit, filters)，可作为响应缓存的键：
+      fields=project_name,delivery_date  只返回这些字段（id和key总是返回）
+      offset=0&limit=20                  分页
+      client= / classification= / responsible= / workshop_progress= / source=
+                                         筛选，同一字段可重复（任一匹配），不同字段同时满足
+      since=<版本>                        增量，只在没有以上参数时有效
+    参数不合法时抛出ValueError。
+    """
+    since = args.get('since', type=int)
+    fields = None
+    if args.get('fields'):
+        requested = [name.strip() for name in args['fields'].split(',') if name.strip()]
+        unknown = [name for name in requested if name not in ROW_FIELDS]
+        if unknown:
+            raise ValueError(f"未知字段: {', '.join(unknown)}")
+        fields = tuple(dict.fromkeys(['id', 'key'] + requested))
+    offset = args.get('offset', 0, type=int)
+    limit = args.get('limit', type=int)
+    if offset < 0 or (limit is not None and limit < 0):
+        raise ValueError("offset和limit不能为负数")
+    filters = []
+    for column in FILTER_COLUMNS:
+        values = sorted({value.strip() for value in args.getlist(column) if value.strip()})
+        if values:
+            filters.append((column, tuple(values)))
+    return since, fields, offset, limit, tuple(filters)
+
+def select_rows(snapshot, filters):
+    """按筛选索引取出匹配的行（保持表格顺序），不扫描全部数据"""
+    data = snapshot.data or []
+    positions = None
+    for column, values in filters:
+        column_index = snapshot.filter_index.get(column, {})
+        matched = set()
+        for value in values:
+            matched.update(column_index.get(value, ()))
+        positions = matched if positions is None else positions & matched
+    if positions is None:
+        return data
+    return [data[position] for position in sorted(positions)]
+
+def project_rows(rows, fields):
+    """字段投影，fields为None时原样返回"""
+    if fields is None:
+        return rows
+    return [{name: row[name] for name in fields if name in row} for row in rows]
+
+def data_response_variants(snapshot, query):
+    """
+    /api/data 的预压缩响应 {编码: (响应体, ETag)}，query 为 parse_data_query 的结果。
+    ?since=<版本> 只返回该版本之后的项目增量；同一快照内按查询参数复用已序列化的响应，
+    多进程部署时优先使用领导进程发布的共享响应。
+    带筛选、字段或分页参数时总是返回全量（不支持增量），缓存键中不含since，各客户端版本共用一份响应。
+    """
+    since, fields, offset, limit, filters = query
+    if query[1:] == (None, 0, None, ()):
+        cache_key = since
+    else:
+        since = None
+        cache_key = (None,) + query[1:]
+    variants = snapshot.shared_responses.get(cache_key) or snapshot.responses.get(cache_key)
+    RESPONSE_CACHE_LOOKUPS.inc(result='miss' if variants is None else 'hit')
+    if variants is None:
+        response = {
+            'status': 'success',
+            'periods': snapshot.periods or {},
+            'alerts': snapshot.alerts or [],
+            # 返回活跃预警
+            'active_alerts': snapshot.active_alerts,
+            'timestamp': snapshot.generated_at,
+            'alert_settings': snapshot.alert_settings or alert_settings,
+            'version': snapshot.version
+        }
+        if filters or offset or limit is not None:
+            # 筛选和分页只返回全量的一页
+            rows = select_rows(snapshot, filters)
+            end = None if limit is None else offset + limit
+            response['total'] = len(rows)
+            response['offset'] = offset
+            response['limit'] = limit
+            response['data'] = project_rows(rows[offset:end], fields)
+            page_keys = {row['key'] for row in rows[offset:end]}
+            response['display'] = {name: value if name == 'date' else [key for key in value if key in page_keys]
+                                   for name, value in snapshot.display.items()}
+        else:
+            delta = build_delta(snapshot, since) if since is not None else None
+            if delta is not None:
+                response['since'] = since
+                response['delta'] = delta
+            else:
+                response['data'] = project_rows(snapshot.data or [], fields)
+            response['display'] = snapshot.display
+        variants = encode_response(response)
+        if len(snapshot.responses) >= RESPONSE_CACHE_SIZE:
+            snapshot.responses.clear()
+        snapshot.responses[cache_key] = variants
+    return variants
+
 @app.route('/api/data', methods=['GET'])
+@timed(API_DATA_SECONDS)
 def get_progress():
     try:
-        data, periods, alerts = update_cache()
-        if data is None:
-            data = []
-        if periods is None:
-            periods = {}
-        if alerts is None:
-            alerts = []
-        
-        # 返回活跃预警
-        active_alerts_list = [alert['data'] for alert in active_alerts.values()]
-        
-        return jsonify({
-            'status': 'success',
-            'data': data,
-            'periods': periods,
-            'alerts': alerts,
-            'active_alerts': active_alerts_list,
-            'timestamp': data_cache['timestamp'],
-            'alert_settings': alert_settings
-        })
+        snapshot = update_cache()
+        try:
+            query = parse_data_query(request.args)
+        except ValueError as e:
+            return jsonify({'status': 'error', 'message': str(e)}), 400
+        return conditional_response(data_response_variants(snapshot, query))
     except Exception as e:
         # 返回缓存中的旧数据
-        cached_data = data_cache['data'] or []
-        cached_periods = data_cache['periods'] or {}
-        cached_alerts = data_cache['alerts'] or []
-        active_alerts_list = [alert['data'] for alert in active_alerts.values()]
+        snapshot = current_snapshot
         
         return jsonify({
             'status': 'error',
             'message': str(e),
-            'data': cached_data,
-            'periods': cached_periods,
-            'alerts': cached_alerts,
-            'active_alerts': active_alerts_list,
+            'data': snapshot.data or [],
+            'periods': snapshot.periods or {},
+            'alerts': snapshot.alerts or [],
+            'active_alerts': snapshot.active_alerts,
             'alert_settings': alert_settings,
             'cached': True
         }), 500
 
+def parse_history_time(value, end_of_day=False):
+    """时间参数：时间戳或日期（如 2025-06-28），日期作为结束时间时取当天结束"""
+    if value is None or value == '':
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    day = parse_alert_date(value)
+    if day is None:
+        raise ValueError(f"无法识别的时间: {value}")
+    moment = datetime(day.year, day.month, day.day)
+    if end_of_day:
+        moment += timedelta(days=1) - timedelta(microseconds=1)
+    return moment.timestamp()
+
+@app.route('/api/history', methods=['GET'])
+def get_history():
+    """
+    进度历史：/api/history?key=<项目key>&key=...&start=2025-06-01&end=2025-07-01
+    返回每个项目的时间序列（series）和按进度周期汇总的环比变化（periods），
+    指定start时序列的第一条为start之前最后一次记录的值（baseline）。
+    不指定key时返回所有项目；也不指定时间时只返回最近 HISTORY_DEFAULT_DAYS 天。
+    """
+    if history_store is None:
+        return jsonify({'status': 'error', 'message': '未启用进度历史'}), 404
+    try:
+        start = parse_history_time(request.args.get('start'))
+        end = parse_history_time(request.args.get('end'), end_of_day=True)
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    try:
+        keys = [key for key in request.args.getlist('key') if key]
+        history = history_store.query(keys or None, start, end)
+        projects = []
+        for key, entry in history.items():
+            projects.append(dict(entry['project'] or {}, key=key, series=entry['series'],
+                                 periods=summarize_periods(entry['series'])))
+        return jsonify({'status': 'success', 'projects': projects})
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@app.route('/api/stream')
+def event_stream():
+    """
+    SSE推送：data-changed（数据版本变化）、alerts-changed（活跃预警变化）、alert-fired（定时播报）。
+    多进程部署时连接数达到 STREAM_MAX_CLIENTS 后返回503，看板继续轮询 /api/data。
+    """
+    limit = STREAM_MAX_CLIENTS if process_role != 'standalone' else None
+    subscriber = event_broker.subscribe(limit)
+    if subscriber is None:
+        STREAM_REJECTED.inc()
+        logging.warning(f"SSE连接数已达上限 {limit}，拒绝新连接")
+        response = jsonify({'status': 'error', 'message': 'SSE连接数已满，请使用轮询'})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(STREAM_RETRY_AFTER)
+        return response
+
+    def generate():
+        try:
+            yield f"event: hello\ndata: {app.json.dumps({'version': current_snapshot.version})}\n\n"
+            while True:
+                try:
+                    event, data = subscriber.get(timeout=STREAM_KEEPALIVE)
+                except queue.Empty:
+                    yield ': keepalive\n\n'
+                    continue
+                yield f"event: {event}\ndata: {app.json.dumps(data, ensure_ascii=False)}\n\n"
+        finally:
+            event_broker.unsubscribe(subscriber)
+
+    response = Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # 关闭反向代理缓冲
+    })
+    # 连接在开始推送前就断开时生成器的finally不会执行，关闭响应时也退订，连接数不会虚占
+    response.call_on_close(lambda: event_broker.unsubscribe(subscriber))
+    return response
+
 @app.route('/api/save_settings', methods=['POST'])
 def save_alert_settings():
     try:
@@ -507,15 +2245,19 @@ def save_alert_settings():
             return jsonify({'status': 'error', 'message': '时间格式无效'}), 400
         
         # 更新设置
+        # 整体替换设置字典，其它线程不会读到修改到一半的设置
         global alert_settings
-        alert_settings['afternoon_alert_time'] = afternoon_alert_time
-        alert_settings['morning_alert_time'] = morning_alert_time
-        alert_settings['last_modified'] = time.time()
+        new_settings = dict(alert_settings)
+        new_settings['afternoon_alert_time'] = afternoon_alert_time
+        new_settings['morning_alert_time'] = morning_alert_time
+        new_settings['last_modified'] = time.time()
         
         # 保存到文件
-        if save_settings(alert_settings):
+        if save_settings(new_settings):
+            alert_settings = new_settings
+            
             # 刷新缓存
-            update_cache()
+            update_cache(force=True)
             
             # 重新设置定时任务
             setup_alert_jobs()
@@ -526,109 +2268,688 @@ def save_alert_settings():
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
+def _format_due(due):
+    return due.strftime('%Y-%m-%d %H:%M') if due else None
+
 @app.route('/health')
 def health_check():
     return jsonify({
         'status': 'healthy',
+        'role': process_role,
+        'pid': os.getpid(),
         'timestamp': time.time(),
-        'cache_age': time.time() - data_cache['timestamp']
+        'cache_age': time.time() - last_refresh,
+        'version': current_snapshot.version,
+        'warm': current_snapshot.warm,
+        'next_alert_due': _format_due(current_snapshot.alert_index.next_due(alert_settings)),
+        'refresh': refresh_stats,
+        'sources': [{name: source[name] for name in ('source', 'path', 'sheet', 'rows')}
+                    for source in current_snapshot.sources],
+        'speech': speech_worker.stats
     })
 
+Gauge('progress_projects', '当前快照中的项目数', lambda: len(current_snapshot.data or []))
+Gauge('progress_active_alerts', '当前活跃预警数', lambda: len(current_snapshot.active_alerts))
+Gauge('progress_data_version', '当前数据版本', lambda: current_snapshot.version)
+Gauge('progress_cache_age_seconds', '距上次刷新的时间', lambda: time.time() - last_refresh if last_refresh else 0)
+Gauge('progress_stream_subscribers', 'SSE连接数', lambda: len(event_broker._subscribers))
+Gauge('progress_file_events_total', '收到的工作簿文件事件数', lambda: refresh_stats['events'], kind='counter')
+Gauge('progress_refreshes_total', '后台刷新次数', lambda: refresh_stats['refreshes'], kind='counter')
+Gauge('progress_parses_total', '实际解析工作簿次数', lambda: refresh_stats['parses'], kind='counter')
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus文本格式的指标"""
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.expose())
+    return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
+
+# 页面中引用同目录资源的属性，如 src="dashboard.js"、href="dashboard.css"
+ASSET_REFERENCE = re.compile(r'\b(src|href)="([^"/?#:]+)"')
+
+class StaticAssets:
+    """
+    STATIC_DIR 中的页面和资源，载入时一次性读入内存并预先压缩（gzip/brotli）。
+    资源（css/js等）按内容哈希生成带指纹的地址 /static/<名称>.<哈希>.<扩展名>，可以长期缓存；
+    页面中对资源的引用替换为带指纹的地址。页面本身（及未带指纹的地址）每次由浏览器用ETag/Last-Modified验证。
+    目录中的文件修改后，下一次请求页面时重新载入。
+    """
+    def __init__(self, directory):
+        # 相对路径按应用所在目录解析，与工作目录无关
+        self.directory = os.path.join(app.root_path, directory)
+        self._lock = threading.Lock()
+        self._signature = None
+        self.files = {}  # 请求路径 -> (预压缩的变体, 类型, 最后修改时间, Cache-Control)
+        self.fingerprints = {}  # 文件名 -> 带指纹的地址
+
+    def _scan(self):
+        try:
+            return tuple(sorted((entry.name, entry.stat().st_mtime_ns, entry.stat().st_size)
+                                for entry in os.scandir(self.directory)
+                                if entry.is_file() and not entry.name.startswith('.')))
+        except OSError:
+            return ()
+
+    def load(self):
+        """目录中的文件有变化时重新载入，返回是否重新载入"""
+        signature = self._scan()
+        if signature == self._signature:
+            return False
+        with self._lock:
+            if signature == self._signature:
+                return False
+            contents = {}
+            for name, _, _ in signature:
+                with open(os.path.join(self.directory, name), 'rb') as f:
+                    contents[name] = f.read()
+            last_modified = max((mtime for _, mtime, _ in signature), default=0) / 1e9
+
+            fingerprints = {}
+            for name, body in contents.items():
+                if not name.endswith('.html'):
+                    stem, ext = os.path.splitext(name)
+                    digest = hashlib.blake2b(body, digest_size=6).hexdigest()
+                    fingerprints[name] = f'/static/{stem}.{digest}{ext}'
+
+            files = {}
+            for name, body in contents.items():
+                mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+                if name in fingerprints:
+                    files[fingerprints[name][1:]] = (compress_variants(body), mimetype, last_modified,
+                                                     f'public, max-age={STATIC_MAX_AGE}, immutable')
+                else:
+                    body = ASSET_REFERENCE.sub(
+                        lambda m: f'{m.group(1)}="{fingerprints.get(m.group(2), m.group(2))}"',
+                        body.decode('utf-8')).encode('utf-8')
+                files[name] = (compress_variants(body), mimetype, last_modified, 'no-cache')
+            self.files, self.fingerprints = files, fingerprints
+            self._signature = signature
+        logging.info(f"已载入静态资源: {len(contents)} 个文件")
+        return True
+
+    def lookup(self, path):
+        if not path.startswith('static/'):
+            # 页面请求时检查文件是否有修改；带指纹的地址内容不会变
+            self.load()
+        return self.files.get(path)
+
+static_assets = StaticAssets(STATIC_DIR)
+
 @app.route('/')
 def index():
-    return send_from_directory('.', 'index.html')
+    return static_file('index.html')
 
 @app.route('/<path:path>')
 def static_file(path):
-    return send_from_directory('.', path)
+    """只提供 STATIC_DIR 中的页面和资源，工作目录中的设置、数据文件和工作簿不对外提供"""
+    asset = static_assets.lookup(path)
+    if asset is None:
+        abort(404)
+    variants, mimetype, last_modified, cache_control = asset
+    return conditional_response(variants, mimetype, cache_control, last_modified)
 
 def start_file_monitor():
+    refresh_worker.start()
     event_handler = ExcelFileHandler()
     observer = Observer()
-    observer.schedule(event_handler, path='.', recursive=False)
+    for directory in sorted({watched_dir for watched_dir, _ in watched_patterns()}):
+        observer.schedule(event_handler, path=directory, recursive=False)
     observer.start()
     return observer
 
+def shared_path(name):
+    return os.path.join(SHARED_STATE_DIR, name)
+
+def shared_queries(snapshot):
+    """领导进程预先生成并共享的 /api/data 查询：全量，以及从最近几个版本起的增量（含当前版本，即没有变化）"""
+    versions = [entry[0] - 1 for entry in snapshot.deltas[-SHARED_DELTA_RESPONSES:]] + [snapshot.version]
+    return [(None, None, 0, None, ())] + [(since, None, 0, None, ()) for since in dict.fromkeys(versions)]
+
+def remove_old_body_files(current):
+    """只保留最近 SHARED_BODY_FILES 个共享响应体文件（工作进程可能还在映射较旧的文件）"""
+    paths = []
+    for path in glob.glob(shared_path('bodies-*.bin')):
+        try:
+            paths.append((os.stat(path).st_mtime_ns, path))
+        except OSError:
+            pass
+    for _, path in sorted(paths)[:-SHARED_BODY_FILES]:
+        if os.path.basename(path) == current:
+            continue
+        try:
+            os.remove(path)
+        except OSError:  # Windows上仍被映射的文件下次再删
+            pass
+
+def publish_shared_snapshot(snapshot):
+    """
+    领导进程：常用的 /api/data 响应只序列化和压缩一次，响应体依次写入 bodies-<版本>.bin，
+    工作进程映射该文件后直接返回其中的响应体；
+    快照（不含已序列化的响应）、响应索引 {查询: {编码: (位置, 长度, ETag)}} 和预警设置写入 snapshot.pkl。
+    """
+    shared = replace(snapshot, responses={}, shared_responses={})
+    settings = alert_settings
+    refreshed_at = last_refresh
+
+    def serialize():
+        chunks, index, offset = [], {}, 0
+        for query in shared_queries(snapshot):
+            variants = index[query[0]] = {}
+            for encoding, (body, etag) in data_response_variants(snapshot, query).items():
+                variants[encoding] = (offset, len(body), etag)
+                chunks.append(body)
+                offset += len(body)
+        bodies_name = f'bodies-{snapshot.version}-{int(snapshot.generated_at * 1000)}.bin'
+        # 先写响应体，snapshot.pkl 更新后工作进程才会去映射它
+        write_atomic(shared_path(bodies_name), b''.join(chunks))
+        remove_old_body_files(bodies_name)
+        return pickle.dumps({
+            'snapshot': shared,
+            'alert_settings': settings,
+            'last_refresh': refreshed_at,
+            'refresh_stats': dict(refresh_stats),
+            'bodies': bodies_name,
+            'responses': index
+        }, protocol=pickle.HIGHEST_PROTOCOL)
+    persistence_writer.submit(shared_path('snapshot.pkl'), serialize, '发布共享快照失败')
+
+def publish_shared_events():
+    """领导进程：把最近的SSE事件写入共享文件，工作进程转发给各自的订阅者"""
+    persistence_writer.submit(shared_path('events.pkl'),
+                              lambda: pickle.dumps(list(event_broker.history), protocol=pickle.HIGHEST_PROTOCOL),
+                              '发布共享事件失败')
+
+leader_lock_file = None
+
+def try_acquire_leader_lock():
+    """非阻塞地获取领导锁，进程退出时操作系统自动释放"""
+    global leader_lock_file
+    lock_file = open(shared_path('leader.lock'), 'a+')
+    try:
+        if os.name == 'nt':
+            import msvcrt
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return False
+    leader_lock_file = lock_file
+    return True
+
+def become_leader():
+    """成为领导进程：加载预警、解析工作簿并发布快照，启动文件监听和定时预警"""
+    global process_role
+    process_role = 'leader'
+    logging.info(f"进程 {os.getpid()} 成为领导进程")
+    load_active_alerts()
+    if WARM_START:
+        warm_start()
+    else:
+        publish_shared_snapshot(update_cache(force=True))
+    start_file_monitor()
+    get_scheduler().start()
+    setup_alert_jobs()
+
+class SharedStateReader:
+    """
+    多进程部署的后台线程。
+    工作进程：发现共享快照文件更新后载入快照（每个进程一份），映射领导进程写出的响应体文件，
+    常用的 /api/data 响应直接从映射返回、不重新序列化和压缩；转发领导进程的事件，
+    并不断尝试获取领导锁（领导进程退出后由一个工作进程接管）。
+    领导进程：按缓存时间定期刷新，发现工作进程保存了新的预警设置后重新设置预警任务。
+    """
+    def __init__(self, interval=SHARED_POLL_INTERVAL):
+        self.interval = interval
+        self._snapshot_signature = None
+        self._last_event = None
+        self._settings_mtime = None
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='shared-state', daemon=True)
+            self._thread.start()
+        return self
+
+    def load_snapshot(self):
+        """共享快照有更新时载入，返回是否载入了新快照"""
+        global current_snapshot, alert_settings, last_refresh
+        path = shared_path('snapshot.pkl')
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        signature = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        if signature == self._snapshot_signature or stat.st_size == 0:
+            return False
+        with open(path, 'rb') as f:
+            payload = pickle.load(f)
+        try:
+            with open(shared_path(payload['bodies']), 'rb') as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except OSError as e:
+            # 响应体文件已被更新的快照替换，下次检查时载入新快照
+            logging.warning(f"共享响应体不可用: {str(e)}")
+            return False
+        # 响应体不复制到本进程，返回200时才从映射中取出；映射在不再被引用时关闭
+        view = memoryview(mapped)
+        shared_responses = {
+            cache_key: {encoding: (view[offset:offset + length], etag)
+                        for encoding, (offset, length, etag) in variants.items()}
+            for cache_key, variants in payload['responses'].items()
+        }
+        current_snapshot = replace(payload['snapshot'], shared_responses=shared_responses)
+        alert_settings = payload['alert_settings']
+        last_refresh = payload['last_refresh']
+        refresh_stats.update(payload['refresh_stats'])
+        self._snapshot_signature = signature
+        return True
+
+    def dispatch_events(self):
+        """转发领导进程新发布的事件；首次读取只记录位置，不重放旧事件"""
+        try:
+            with open(shared_path('events.pkl'), 'rb') as f:
+                events = pickle.load(f)
+        except (OSError, EOFError):
+            events = []
+        first_read = self._last_event is None
+        for event_time, sequence, event, data in events:
+            position = (event_time, sequence)
+            if not first_read and position <= self._last_event:
+                continue
+            self._last_event = position
+            if first_read:
+                continue
+            if event == 'data-changed' and (data.get('version', 0) > current_snapshot.version or
+                                            data.get('date') != current_snapshot.display.get('date')):
+                # 事件可能先于快照写出，先载入快照再通知前端
+                self.load_snapshot()
+            event_broker.deliver(event, data)
+        if first_read:
+            self._last_event = self._last_event or (0, 0)
+
+    def check_settings(self):
+        """领导进程：其它进程保存了预警设置时重新加载并重新设置预警任务"""
+        global alert_settings
+        try:
+            mtime = os.stat(SETTINGS_PATH).st_mtime_ns
+        except OSError:
+            return
+        if mtime == self._settings_mtime:
+            return
+        first_check = self._settings_mtime is None
+        self._settings_mtime = mtime
+        settings = load_settings()
+        if not first_check and settings != alert_settings:
+            logging.info("预警设置已被其它进程修改，重新设置预警任务")
+            alert_settings = settings
+            update_cache(force=True)
+            setup_alert_jobs()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                if process_role == 'worker':
+                    self.load_snapshot()
+                    self.dispatch_events()
+                    if try_acquire_leader_lock():
+                        become_leader()
+                elif process_role == 'leader':
+                    self.check_settings()
+                    update_cache()
+            except Exception as e:
+                logging.error(f"共享状态同步错误: {str(e)}")
+
+shared_reader = SharedStateReader()
+
+def start_standalone():
+    """单进程运行（python app.py）：加载预警和数据，启动文件监听和定时预警"""
+    static_assets.load()
+    load_active_alerts()
+    if WARM_START:
+        warm_start()
+    else:
+        update_cache()
+    start_file_monitor()
+    get_scheduler().start()
+    setup_alert_jobs()
+
+def start_shared_mode():
+    """
+    多进程部署（wsgi.py 在每个工作进程中调用）：抢到领导锁的进程负责监听、解析和定时预警，
+    并把每个新快照发布到共享文件；其余进程只从共享快照提供 /api/data，预警不会重复播报。
+    """
+    global process_role
+    static_assets.load()
+    os.makedirs(SHARED_STATE_DIR, exist_ok=True)
+    if try_acquire_leader_lock():
+        become_leader()
+    else:
+        process_role = 'worker'
+        shared_reader.load_snapshot()
+        shared_reader.dispatch_events()
+        logging.info(f"进程 {os.getpid()} 作为工作进程，使用共享快照")
+    shared_reader.start()
+
 # 语音播报函数
+def play_audio_file(path):
+    """播放wav文件，没有可用的播放器时返回False"""
+    try:
+        import winsound
+        winsound.PlaySound(path, winsound.SND_FILENAME)
+        return True
+    except ImportError:
+        pass
+    for player in (['afplay'], ['aplay', '-q'], ['paplay']):
+        if shutil.which(player[0]):
+            return subprocess.run(player + [path], capture_output=True).returncode == 0
+    return False
+
+class Pyttsx3Backend:
+    """pyttsx3 语音引擎，整个进程只初始化一次，只在语音线程中使用"""
+    def __init__(self):
+        self.engine = pyttsx3.init()
+
+    def speak(self, message):
+        self.engine.say(message)
+        self.engine.runAndWait()
+
+    def synthesize(self, message, path):
+        self.engine.save_to_file(message, path)
+        self.engine.runAndWait()
+        return os.path.exists(path) and os.path.getsize(path) > 0
+
+    def play(self, path):
+        return play_audio_file(path)
+
+class NullBackend:
+    """无声后端：只记录播报内容，用于没有音频设备的Linux服务器和测试"""
+    def __init__(self):
+        self.spoken = []
+        self.played = []
+
+    def speak(self, message):
+        logging.info(f"[无声播报] {message}")
+        self.spoken.append(message)
+
+    def synthesize(self, message, path):
+        with open(path, 'wb') as f:
+            f.write(message.encode('utf-8'))
+        return True
+
+    def play(self, path):
+        logging.info(f"[无声播放] {path}")
+        self.played.append(path)
+        return True
+
+def create_tts_backend():
+    if TTS_BACKEND == 'null':
+        return NullBackend()
+    try:
+        return Pyttsx3Backend()
+    except Exception as e:
+        logging.error(f"语音引擎初始化失败，改用无声播报: {str(e)}")
+        return NullBackend()
+
+class SpeechWorker:
+    """
+    语音播报线程：调度任务只把消息放入队列，不等待播报完成。
+    队列有上限，排队或正在播报的相同消息不重复加入；
+    合成的语音按消息内容缓存为文件，每天重复的播报不需要重新合成。
+    """
+    def __init__(self, backend_factory=create_tts_backend, maxsize=TTS_QUEUE_SIZE, repeat=TTS_REPEAT,
+                 cache_dir=TTS_CACHE_DIR, cache_max_files=TTS_CACHE_MAX_FILES):
+        self.backend_factory = backend_factory
+        self.repeat = repeat
+        self.cache_dir = cache_dir
+        self.cache_max_files = cache_max_files
+        self.backend = None
+        self.stats = {'queued': 0, 'spoken': 0, 'duplicates': 0, 'dropped': 0, 'cache_hits': 0, 'synthesized': 0}
+        self._queue = queue.Queue(maxsize)
+        self._pending = set()  # 排队中或正在播报的消息
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def say(self, message):
+        """加入播报队列，重复或队列已满时返回False"""
+        if not message:
+            return False
+        with self._lock:
+            if message in self._pending:
+                self.stats['duplicates'] += 1
+                logging.info("相同的预警正在播报，跳过")
+                return False
+            try:
+                self._queue.put_nowait(message)
+            except queue.Full:
+                self.stats['dropped'] += 1
+                logging.warning("语音播报队列已满，丢弃本次播报")
+                return False
+            self._pending.add(message)
+            self.stats['queued'] += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='speech-worker', daemon=True)
+                self._thread.start()
+        return True
+
+    def join(self):
+        """等待队列中的消息播报完"""
+        self._queue.join()
+
+    def _run(self):
+        # 引擎在语音线程中创建（Windows下SAPI的COM对象只能在创建它的线程使用）
+        self.backend = self.backend_factory()
+        while True:
+            message = self._queue.get()
+            try:
+                path = self._cached_audio(message)
+                for _ in range(self.repeat):
+                    if path is None or not self.backend.play(path):
+                        self.backend.speak(message)
+                self.stats['spoken'] += 1
+            except Exception as e:
+                logging.error(f"语音播报错误: {str(e)}")
+            finally:
+                with self._lock:
+                    self._pending.discard(message)
+                self._queue.task_done()
+
+    def _cached_audio(self, message):
+        """返回消息对应的语音文件，首次播报时合成；不能合成时返回None"""
+        if not self.cache_dir:
+            return None
+        name = hashlib.blake2b(message.encode('utf-8'), digest_size=16).hexdigest()
+        path = os.path.join(self.cache_dir, f'{name}.wav')
+        if os.path.exists(path):
+            os.utime(path)
+            self.stats['cache_hits'] += 1
+            return path
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = os.path.join(self.cache_dir, f'{name}.tmp.wav')
+            if not self.backend.synthesize(message, tmp_path):
+                return None
+            os.replace(tmp_path, path)
+            self.stats['synthesized'] += 1
+            self._prune_cache()
+            return path
+        except Exception as e:
+            logging.error(f"语音合成错误: {str(e)}")
+            return None
+
+    def _prune_cache(self):
+        """只保留最近使用的 cache_max_files 个语音文件"""
+        files = [entry for entry in os.scandir(self.cache_dir) if entry.name.endswith('.wav')]
+        if len(files) <= self.cache_max_files:
+            return
+        files.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in files[:len(files) - self.cache_max_files]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+speech_worker = SpeechWorker()
+
 def voice_alert(message):
-    if not message:
-        return
-        
-    engine = pyttsx3.init()
-    for _ in range(2):  # 播报两次
-        engine.say(message)
-        engine.runAndWait()
+    """放入语音队列后立即返回，不阻塞调度线程"""
+    speech_worker.say(message)
 
-def trigger_alert(mode):
+def trigger_alert(mode, alert_date=None):
     """
     mode: 'afternoon'（前一天）或 'morning'（当天）
+    alert_date: 按日期注册的任务传入对应的预警日期，延迟触发时也不会播报错日期
     每次定时点只播报该定时点应播报的预警，无论是否已播报过。
     """
-    update_cache()
-    now = datetime.now()
-    today = now.date()
-    alerts_to_broadcast = []
-    for project in data_cache['data']:
-        alert_date = parse_alert_date(project['alert_date'])
-        alert_content = str(project.get('alert_content', '')).strip()
-        project_name = str(project.get('project_name', '')).strip()
-        if not alert_date or not alert_content or not project_name:
-            continue
-        if mode == 'afternoon' and today == alert_date - timedelta(days=1):
-            alerts_to_broadcast.append(project)
-        elif mode == 'morning' and today == alert_date:
-            alerts_to_broadcast.append(project)
+    snapshot = update_cache(force=True)
+    today = datetime.now().date()
+    if alert_date is not None:
+        alerts_to_broadcast = snapshot.alert_index.projects_on(alert_date)
+    elif mode == 'afternoon':
+        alerts_to_broadcast = snapshot.alert_index.projects_on(today + timedelta(days=1))
+    elif mode == 'morning':
+        alerts_to_broadcast = snapshot.alert_index.projects_on(today)
+    else:
+        alerts_to_broadcast = []
     if alerts_to_broadcast:
         alert_message = ""
         for alert in alerts_to_broadcast:
             alert_message += f"{alert['project_name']}，{alert['alert_date']}，{alert['alert_content']}。"
         if alert_message:
             logging.info(f"[{mode}] 播报警报: {alert_message}")
+            event_broker.publish('alert-fired', {
+                'mode': mode,
+                'alerts': [{
+                    'id': alert['id'],
+                    'project_name': alert['project_name'],
+                    'alert_date': alert['alert_date'],
+                    'alert_content': alert['alert_content']
+                } for alert in alerts_to_broadcast]
+            })
             voice_alert(alert_message)
     else:
         logging.info(f"[{mode}] 当前没有需要播报的预警")
 
 # 设置定时任务
+ALERT_JOB_PREFIX = 'alert:'
+CRON_JOB_IDS = ('afternoon_alert', 'morning_alert')
+DAY_REFRESH_JOB_ID = 'day_refresh'
+# 任务函数用文本引用登记：持久化的任务在 python app.py 和 wsgi.py 两种启动方式下都能还原
+# （直接传函数对象时 python app.py 下保存为 __main__:trigger_alert）
+ALERT_JOB_FUNC = 'app:trigger_alert'
+DAY_REFRESH_JOB_FUNC = 'app:update_cache'
+
+def alert_job_runs(alert_index, settings, now=None):
+    """按日期注册时应有的任务 {任务id: (触发时间, mode, 预警日期)}，已过时间点的不再注册"""
+    now = now or datetime.now()
+    runs = {}
+    afternoon = settings.get('afternoon_alert_time', '13:59')
+    morning = settings.get('morning_alert_time', '00:00')
+    for day in alert_index.dates[bisect_left(alert_index.dates, now.date()):]:
+        for mode, run_date in (('afternoon', alert_time_on(day - timedelta(days=1), afternoon)),
+                               ('morning', alert_time_on(day, morning))):
+            if run_date > now:
+                runs[f'{ALERT_JOB_PREFIX}{mode}:{day.isoformat()}'] = (run_date, mode, day)
+    return runs
+
+def sync_alert_jobs(alert_index=None, settings=None):
+    """
+    让按日期注册的预警任务与预警索引一致：只删除、新增或改期有变化的任务，
+    未变化的任务（包括持久化后重启恢复的任务）保持不动。
+    """
+    if ALERT_SCHEDULE_MODE != 'date' or scheduler is None or not scheduler.running:
+        return
+    from apscheduler.triggers.date import DateTrigger
+    alert_index = alert_index or current_snapshot.alert_index
+    settings = settings or alert_settings
+    try:
+        runs = alert_job_runs(alert_index, settings)
+    except Exception as e:
+        logging.error(f"时间检查错误: {str(e)}")
+        return
+    
+    added = rescheduled = removed = 0
+    existing = {job.id: job for job in scheduler.get_jobs() if job.id.startswith(ALERT_JOB_PREFIX)}
+    for job_id, job in list(existing.items()):
+        if job_id not in runs or job.func_ref != ALERT_JOB_FUNC:
+            # 旧版本以函数对象登记的任务删除后按文本引用重新登记
+            scheduler.remove_job(job_id)
+            del existing[job_id]
+            if job_id not in runs:
+                removed += 1
+    for job_id, (run_date, mode, day) in runs.items():
+        trigger = DateTrigger(run_date=run_date, timezone=scheduler.timezone)
+        job = existing.get(job_id)
+        if job is None:
+            scheduler.add_job(ALERT_JOB_FUNC, trigger=trigger, args=[mode, day], id=job_id,
+                              misfire_grace_time=ALERT_MISFIRE_GRACE, coalesce=True)
+            added += 1
+        elif job.trigger.run_date != trigger.run_date:
+            scheduler.reschedule_job(job_id, trigger=trigger)
+            rescheduled += 1
+    if added or rescheduled or removed:
+        logging.info(f"预警任务已更新: 新增 {added}，改期 {rescheduled}，删除 {removed}，共 {len(runs)} 个")
+
 def setup_alert_jobs():
     """
-    只保留前一天和当天两个定时任务，分别调用trigger_alert('afternoon')和trigger_alert('morning')。
+    ALERT_SCHEDULE_MODE 为 'date' 时只为有预警的日期注册一次性任务，
+    为 'cron' 时保留前一天和当天两个每日定时任务，分别调用trigger_alert('afternoon')和trigger_alert('morning')。
     重新设置预警时间后立即生效。
     """
-    global scheduler, alert_settings
-    scheduler.remove_all_jobs()
+    global alert_settings
+    if process_role == 'worker':
+        # 只有领导进程运行定时预警，设置文件变化后由领导进程重新设置
+        return
+    from apscheduler.triggers.cron import CronTrigger
+    scheduler = get_scheduler()
+    # 每天零点后刷新一次，更新与日期有关的显示标记（工作簿没有变化时不会重新解析）
+    scheduler.add_job(DAY_REFRESH_JOB_FUNC, trigger=CronTrigger(hour=0, minute=0, second=5), kwargs={'force': True},
+                      id=DAY_REFRESH_JOB_ID, replace_existing=True)
+    if ALERT_SCHEDULE_MODE == 'date':
+        for job_id in CRON_JOB_IDS:
+            if scheduler.get_job(job_id):
+                scheduler.remove_job(job_id)
+        sync_alert_jobs()
+        logging.info(f"已设置按日期预警任务: 前一天 {alert_settings['afternoon_alert_time']}，当天 {alert_settings['morning_alert_time']}")
+        return
+    
+    for job in scheduler.get_jobs():
+        if job.id.startswith(ALERT_JOB_PREFIX):
+            scheduler.remove_job(job.id)
     afternoon_time = alert_settings['afternoon_alert_time'].split(':')
     morning_time = alert_settings['morning_alert_time'].split(':')
     scheduler.add_job(
-        lambda: trigger_alert('afternoon'),
+        ALERT_JOB_FUNC,
         trigger=CronTrigger(
             hour=int(afternoon_time[0]),
             minute=int(afternoon_time[1])
         ),
-        id='afternoon_alert'
+        args=['afternoon'],
+        id='afternoon_alert',
+        replace_existing=True
     )
     scheduler.add_job(
-        lambda: trigger_alert('morning'),
+        ALERT_JOB_FUNC,
         trigger=CronTrigger(
             hour=int(morning_time[0]),
             minute=int(morning_time[1])
         ),
-        id='morning_alert'
+        args=['morning'],
+        id='morning_alert',
+        replace_existing=True
     )
     logging.info(f"已设置预警任务: 前一天 {alert_settings['afternoon_alert_time']}，当天 {alert_settings['morning_alert_time']}")
 
 if __name__ == '__main__': 
-    # 加载活跃预警 
-    load_active_alerts() 
-    
-    # 预热缓存 
-    update_cache() 
-    
-    # 启动Excel文件监听，自动刷新缓存和预警
-    start_file_monitor()
-    
-    # 配置并启动调度器
-    scheduler.start()
-    setup_alert_jobs()
+    # 任务的文本引用 app:xxx 指向正在运行的这个模块，而不是再导入一份 app
+    sys.modules.setdefault('app', sys.modules[__name__])
+    # 加载活跃预警和数据（预热启动时首次解析在后台进行），启动Excel文件监听和定时预警
+    start_standalone()
     
     try: 
         app.run( 
@@ -639,4 +2960,4 @@ if __name__ == '__main__':
             use_reloader=False 
         ) 
     finally: 
-        scheduler.shutdown()
\ No newline at end of file
+        get_scheduler().shutdown()
\ No newline at end of file
@@ -0,0 +1,143 @@
+# benchmarks/bench_cold_start.py
+"""
+启动基准：从启动进程（python + import app）到 /api/data 第一次返回200的时间。
+  - cold：WARM_START=False，启动时阻塞解析工作簿后才开始服务
+  - warm：WARM_START=True，先用上次保存的 progress_data.json 服务，首次解析在后台进行
+warm 另外记录后台解析完成（/health 的 warm 变为 false）的时间。
+每次启动前删除解析缓存，首次解析都真正读取工作簿。
+
+用法：
+    python benchmarks/bench_cold_start.py --rows 10000 --repeat 3
+"""
+import argparse
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+from common import app, percentile
+from synthetic import write_workbook
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 子进程：导入app（记录导入耗时）后按 python app.py 的方式启动，只监听本机
+CHILD = r'''
+import sys, time
+started = time.perf_counter()
+sys.path.insert(0, {root!r})
+import app
+print(round((time.perf_counter() - started) * 1000, 2), flush=True)
+app.WARM_START = {warm!r}
+app.TTS_BACKEND = 'null'
+app.start_standalone()
+app.app.run(host='127.0.0.1', port={port}, threaded=True, use_reloader=False)
+'''
+# 子进程使用的默认文件名（在其它基准修改app的路径配置之前取得）
+WORKBOOK_NAME = app.EXCEL_FILE_PATH
+JSON_OUTPUT_NAME = app.JSON_OUTPUT_PATH
+PARSE_CACHE_NAME = app.PARSE_CACHE_PATH
+POLL_INTERVAL = 0.005
+START_TIMEOUT = 300
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(url, accept, deadline):
+    """轮询 url 直到 accept(响应JSON) 为真，返回完成时刻"""
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=5) as response:
+                if response.status == 200 and accept(json.load(response)):
+                    return time.perf_counter()
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(POLL_INTERVAL)
+    raise TimeoutError(f'{url} 在 {START_TIMEOUT} 秒内没有就绪')
+
+
+def start_once(work_dir, warm):
+    """启动一次，返回 {import_ms, first_200_ms, fresh_ms}（从启动子进程开始计时）"""
+    cache_path = os.path.join(work_dir, PARSE_CACHE_NAME)
+    if os.path.exists(cache_path):
+        os.remove(cache_path)
+    port = free_port()
+    code = CHILD.format(root=ROOT, warm=warm, port=port)
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, '-c', code], cwd=work_dir, stdout=subprocess.PIPE,
+                               stderr=subprocess.DEVNULL, text=True)
+    try:
+        base = f'http://127.0.0.1:{port}'
+        deadline = started + START_TIMEOUT
+        first = wait_for(f'{base}/api/data', lambda body: body.get('status') == 'success', deadline)
+        fresh = wait_for(f'{base}/health', lambda body: not body.get('warm'), deadline)
+        import_ms = float(process.stdout.readline())
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+    return {
+        'import_ms': import_ms,
+        'first_200_ms': round((first - started) * 1000, 1),
+        'fresh_ms': round((fresh - started) * 1000, 1)
+    }
+
+
+def prepare(work_dir, rows):
+    """生成工作簿，并用一次普通启动写出 progress_data.json（预热启动读取它）"""
+    write_workbook(os.path.join(work_dir, WORKBOOK_NAME), rows)
+    start_once(work_dir, warm=False)
+    deadline = time.perf_counter() + START_TIMEOUT
+    while not os.path.exists(os.path.join(work_dir, JSON_OUTPUT_NAME)):
+        if time.perf_counter() > deadline:
+            raise TimeoutError('没有生成 progress_data.json')
+        time.sleep(0.1)
+
+
+def summarize(runs):
+    summary = {}
+    for name in runs[0]:
+        values = sorted(run[name] for run in runs)
+        summary[name] = {'best': values[0], 'median': percentile(values, 0.5)}
+    return summary
+
+
+def measure_startup(rows, repeat):
+    """cold 与 warm 两种启动方式各启动 repeat 次"""
+    work_dir = tempfile.mkdtemp(prefix='cold_start_')
+    try:
+        prepare(work_dir, rows)
+        result = {'rows': rows}
+        for mode, warm in (('cold', False), ('warm', True)):
+            result[mode] = summarize([start_once(work_dir, warm) for _ in range(repeat)])
+        return result
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def print_startup(result, stream):
+    for mode in ('cold', 'warm'):
+        stats = result[mode]
+        print(f"启动（{result['rows']} 行，{mode}）  import app {stats['import_ms']['median']:7.1f} ms  "
+              f"首次200 {stats['first_200_ms']['median']:8.1f} ms  "
+              f"解析完成 {stats['fresh_ms']['median']:8.1f} ms（中位数）", file=stream)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    for rows in args.rows:
+        print_startup(measure_startup(rows, args.repeat), sys.stdout)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+# benchmarks/bench_excel_ingest.py
+"""
+Excel读取基准：对比单次流式读取与原有两次 read_excel
+
+用法：
+    python benchmarks/bench_excel_ingest.py --rows 1000 5000 --repeat 3
+"""
+import argparse
+import os
+import tempfile
+
+from common import app, best_of, quiet_logging
+from synthetic import write_workbook
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 5000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    quiet_logging()
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            path = os.path.join(tmp, f'bench_{rows}.xlsx')
+            write_workbook(path, rows)
+            app.EXCEL_FILE_PATH = path
+
+            # 两种读取方式的结果必须一致
+            app.EXCEL_SINGLE_PASS = False
+            expected = app.safe_convert_excel()
+            app.EXCEL_SINGLE_PASS = True
+            assert app.safe_convert_excel() == expected, '单次读取结果与两次读取不一致'
+
+            two_pass = best_of(lambda: app.read_excel_two_pass(path), args.repeat)
+            single_pass = best_of(lambda: app.read_excel_single_pass(path), args.repeat)
+            print(f'{rows:>7} 行  两次读取 {two_pass * 1000:9.1f} ms  '
+                  f'单次读取 {single_pass * 1000:9.1f} ms  加速 {two_pass / single_pass:5.2f}x')
+
+
+if __name__ == '__main__':
+    main()
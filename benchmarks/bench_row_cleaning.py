@@ -0,0 +1,135 @@
+# benchmarks/bench_row_cleaning.py
+"""
+行清洗基准：对比按列清洗 clean_project_rows 与原有的 df.iterrows() 逐行清洗
+
+用法：
+    python benchmarks/bench_row_cleaning.py --rows 1000 10000
+"""
+import argparse
+import json
+import logging
+import re
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from common import app, best_of, quiet_logging
+
+PERCENTS = [100, 0, 90, 50.0, 85.5, '90%', '约80', '100%完成', 'abc', '', None, np.nan, 120, -5, True,
+            datetime(2025, 6, 27)]
+ALERT_DATES = ['', None, '2025.6.27', '2025年06月24日', '待定', datetime(2025, 7, 3)]
+CLIENTS = ['蓬莱中柏京鲁船业有限公司', '大连中远海运重工有限公司', None, '  ', '计划出货时间', 12345]
+
+
+def make_frame(rows):
+    """构造与 read_excel 结果相同结构的原始数据（含各种脏数据）"""
+    data = []
+    for i in range(rows):
+        data.append([
+            i + 1, CLIENTS[i % len(CLIENTS)], f'{i}吨散货船\nW{i:05d}' if i % 9 else None,
+            '主配电板、应急配电板、集控台、监测报警系统', ['BV', 'CCS', None][i % 3],
+            f'2025.{i % 12 + 1}.{i % 28 + 1}\nFAT', f'负责人{i % 11}', ['待生产', '待发货', None][i % 3],
+            PERCENTS[i % len(PERCENTS)], PERCENTS[(i + 3) % len(PERCENTS)],
+            PERCENTS[(i + 5) % len(PERCENTS)], PERCENTS[(i + 7) % len(PERCENTS)],
+            ALERT_DATES[i % len(ALERT_DATES)], '客户不看船检签字后直接发货' if i % 4 == 1 else None
+        ])
+    return pd.DataFrame(data, columns=[f'col{i}' for i in range(14)])
+
+
+def clean_rows_iterrows(df):
+    """原有的逐行清洗实现（基线版本 safe_convert_excel 中的代码原样复制），作为对照"""
+    df = df.copy()
+    # 列名处理（新增alert_date和alert_content列）
+    df.columns = [
+        'id', 'client', 'project_name', 'product_name', 'classification',
+        'delivery_date', 'responsible', 'workshop_progress', 'drawing',
+        'software', 'simulation', 'listing', 'alert_date', 'alert_content'
+    ]
+    
+    # 数据清洗
+    valid_rows = []
+    current_id = 1
+    def get_first(x):
+        if isinstance(x, (list, tuple, np.ndarray, pd.Series)):
+            return x[0]
+        return x
+    def isna_all(x):
+        v = pd.isna(x)
+        if isinstance(v, (np.ndarray, pd.Series)):
+            return v.all()
+        return v
+    for _, row in df.iterrows():
+        client = get_first(row['client'])
+        if isinstance(client, str) and ('计划出货时间' in client or '出货日期计划安排表' in client):
+            continue
+        if isna_all(client) or str(client).strip() == '':
+            continue
+        valid_row = {
+            'id': current_id,
+            'client': client if not isna_all(client) else '',
+            'project_name': get_first(row['project_name']) if not isna_all(get_first(row['project_name'])) else '',
+            'product_name': get_first(row['product_name']) if not isna_all(get_first(row['product_name'])) else '',
+            'classification': get_first(row['classification']) if not isna_all(get_first(row['classification'])) else '',
+            'delivery_date': get_first(row['delivery_date']) if not isna_all(get_first(row['delivery_date'])) else '',
+            'responsible': get_first(row['responsible']) if not isna_all(get_first(row['responsible'])) else '',
+            'workshop_progress': get_first(row['workshop_progress']) if not isna_all(get_first(row['workshop_progress'])) else '',
+            'drawing': get_first(row['drawing']) if not isna_all(get_first(row['drawing'])) else 0,
+            'software': get_first(row['software']) if not isna_all(get_first(row['software'])) else 0,
+            'simulation': get_first(row['simulation']) if not isna_all(get_first(row['simulation'])) else 0,
+            'listing': get_first(row['listing']) if not isna_all(get_first(row['listing'])) else 0,
+            'alert_date': get_first(row['alert_date']) if not isna_all(get_first(row['alert_date'])) else '',
+            'alert_content': get_first(row['alert_content']) if not isna_all(get_first(row['alert_content'])) else ''
+        }
+        # 添加调试日志
+        logging.debug(f"读取项目: ID={current_id}, 预警日期={valid_row['alert_date']}, 预警内容={valid_row['alert_content']}")
+        valid_rows.append(valid_row)
+        current_id += 1
+    
+    # 数值类型转换
+    for row in valid_rows:
+        for col in ['drawing', 'software', 'simulation', 'listing']:
+            try:
+                value = row[col]
+                # 只对list/tuple/np.ndarray/pd.Series取第一个元素
+                if isinstance(value, (list, tuple, np.ndarray, pd.Series)):
+                    value = value[0]
+                if isinstance(value, str):
+                    numbers = re.findall(r'\d+', value)
+                    if numbers:
+                        value = int(numbers[0])
+                    else:
+                        value = 0
+                else:
+                    value = int(float(value))
+                row[col] = max(0, min(100, value))
+            except (ValueError, TypeError, IndexError):
+                row[col] = 0
+    
+    return valid_rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    quiet_logging()
+    for rows in args.rows:
+        df = make_frame(rows)
+
+        # 输出必须与原实现逐字节一致
+        expected = clean_rows_iterrows(df)
+        actual = [row.to_dict() for row in app.clean_project_rows(df)]
+        dump = lambda rows: json.dumps(rows, ensure_ascii=False, indent=4, default=str)
+        assert repr(actual) == repr(expected) and dump(actual) == dump(expected), '按列清洗结果与逐行清洗不一致'
+
+        legacy = best_of(lambda: clean_rows_iterrows(df), args.repeat)
+        vectorized = best_of(lambda: app.clean_project_rows(df), args.repeat)
+        print(f'{rows:>7} 行  iterrows {legacy * 1000:9.1f} ms  '
+              f'按列清洗 {vectorized * 1000:9.1f} ms  加速 {legacy / vectorized:6.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+# benchmarks/common.py
+"""基准测试共用：导入app、计时、把应用的输出文件隔离到临时目录"""
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import app  # noqa: E402
+
+
+def best_of(func, repeat):
+    """运行 repeat 次，返回最短耗时(秒)"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def percentile(samples, fraction):
+    """已排序样本的分位数（最近秩）"""
+    if not samples:
+        return None
+    index = min(len(samples) - 1, max(0, int(round(fraction * len(samples) + 0.5)) - 1))
+    return samples[index]
+
+
+def quiet_logging():
+    logging.getLogger().setLevel(logging.WARNING)
+
+
+def isolate_app(tmp_dir):
+    """应用的输出文件都写到临时目录，关闭进度历史，避免基准测试改动工作目录中的文件"""
+    app.JSON_OUTPUT_PATH = os.path.join(tmp_dir, 'progress_data.json')
+    app.PARSE_CACHE_PATH = os.path.join(tmp_dir, 'progress_cache.pkl')
+    app.ALERT_DATA_PATH = os.path.join(tmp_dir, 'alert_data.json')
+    app.history_store = None
+    reset_app_state()
+
+
+def reset_app_state():
+    """清空解析缓存和当前快照，下一次 update_cache 从头解析"""
+    app.persistence_writer.flush()
+    if os.path.exists(app.PARSE_CACHE_PATH):
+        os.remove(app.PARSE_CACHE_PATH)
+    app.parse_cache.clear()
+    app.merged_workbooks.update(parts=None, data=None, periods=None, sources=())
+    app.active_alerts.clear()
+    app.current_snapshot = app.CacheSnapshot(version=int(time.time() * 1000))
+    app.last_refresh = 0
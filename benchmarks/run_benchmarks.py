@@ -0,0 +1,265 @@
+# benchmarks/run_benchmarks.py
+"""
+基准测试套件：用合成工作簿测量各数据规模下的
+  - Excel解析耗时（safe_convert_excel）
+  - 预警：入库时解析预警日期并建索引的耗时，check_alerts 的耗时
+  - /api/data 延迟（p50/p99）和吞吐量（Flask测试客户端，含gzip和304）
+  - 一次完整刷新（解析+建快照）的峰值内存（tracemalloc）
+  - 启动：从启动进程到 /api/data 首次返回200的时间，普通启动与预热启动对比（见 bench_cold_start.py）
+  - 项目数据常驻内存：新旧两代（实际解析）同时存在时，每个项目一个字典 与 ProjectRow+驻留重复文本+共享未变行 的对比
+结果写成JSON（--output），便于跟踪性能回退。
+
+用法：
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --rows 100 1000 --requests 200 --output results.json
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime
+
+import pandas as pd
+from openpyxl import load_workbook
+
+from bench_cold_start import measure_startup, print_startup
+from common import app, best_of, isolate_app, percentile, quiet_logging, reset_app_state
+from synthetic import project_row, write_workbook
+
+DEFAULT_ROWS = [100, 1000, 10000, 100000]
+DEFAULT_MEMORY_ROWS = 50000
+DEFAULT_STARTUP_ROWS = 10000
+CHANGED_FRACTION = 0.01  # 第二代数据中有变化的项目比例
+FIRST_DATA_ROW = 5  # 合成工作簿中第一行项目数据（前4行为标题、周期和表头）
+DRAWING_COLUMN = 9  # I列 图纸进度
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def measure_requests(client, url, count, headers=None):
+    """连续请求 count 次，返回延迟分位数(毫秒)和吞吐量(次/秒)"""
+    latencies = []
+    size = None
+    started = time.perf_counter()
+    for _ in range(count):
+        start = time.perf_counter()
+        response = client.get(url, headers=headers or {})
+        latencies.append((time.perf_counter() - start) * 1000)
+        size = len(response.data)
+        assert response.status_code in (200, 304), f'{url} 返回 {response.status_code}'
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        'p50_ms': round(percentile(latencies, 0.5), 3),
+        'p99_ms': round(percentile(latencies, 0.99), 3),
+        'throughput_rps': round(count / elapsed, 1),
+        'bytes': size
+    }
+
+
+def measure_peak_memory():
+    """从头刷新一次（解析、清洗、建索引、发布快照）的峰值内存(MB)"""
+    reset_app_state()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        app.update_cache(force=True)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round(peak / (1024 * 1024), 2)
+
+
+def traced_megabytes(build):
+    """调用 build()，返回其结果常驻的内存(MB)（结果保持引用，垃圾回收后统计）"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        kept = build()
+        gc.collect()
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del kept
+    return round(current / (1024 * 1024), 2)
+
+
+def write_next_generation(path, next_path):
+    """
+    第二代工作簿：CHANGED_FRACTION 的项目进度有变化，另在最上方插入一个新项目，
+    其后所有项目的id都变了（这些项目沿用上一代的字段值，另建行对象）。
+    """
+    workbook = load_workbook(path)
+    sheet = workbook.active
+    step = max(1, int(1 / CHANGED_FRACTION))
+    for number in range(FIRST_DATA_ROW, sheet.max_row + 1, step):
+        cell = sheet.cell(row=number, column=DRAWING_COLUMN)
+        if isinstance(cell.value, (int, float)):
+            cell.value = (cell.value + 1) % 101
+    sheet.insert_rows(FIRST_DATA_ROW)
+    for column, value in enumerate(project_row(random.Random(1), 0, date.today()), start=1):
+        sheet.cell(row=FIRST_DATA_ROW, column=column, value=value)
+    sheet.cell(row=FIRST_DATA_ROW, column=2, value='新插入的单位')
+    workbook.save(next_path)
+
+
+def measure_row_memory(tmp_dir, rows):
+    """
+    两代项目数据同时存在（刷新期间，或旧快照仍被请求引用）时的内存：
+    两代都由 safe_convert_excel 实际解析工作簿得到，第二代见 write_next_generation。
+    对比每个项目一个字典，与 ProjectRow（compact_rows 驻留重复文本）+ 共享未变行（share_unchanged_rows）。
+    """
+    path = os.path.join(tmp_dir, f'memory_{rows}.xlsx')
+    next_path = os.path.join(tmp_dir, f'memory_{rows}_next.xlsx')
+    write_workbook(path, rows)
+    write_next_generation(path, next_path)
+
+    def generation(source, compact):
+        data, _ = app.safe_convert_excel(source)
+        data = app.assign_project_keys(app.derive_display_fields(data))
+        return app.compact_rows(data) if compact else [row.to_dict() for row in data]
+
+    def two_generations(compact):
+        previous = generation(path, compact)
+        current = generation(next_path, compact)
+        shared = app.share_unchanged_rows(previous, current) if compact else 0
+        return previous, current, shared
+
+    kept = two_generations(True)
+    result = {
+        'rows': len(kept[1]),
+        'shared_rows': kept[2],
+        'one_generation_mb': traced_megabytes(lambda: generation(path, False)),
+        'one_generation_compact_mb': traced_megabytes(lambda: generation(path, True)),
+        'two_generations_mb': traced_megabytes(lambda: two_generations(False)),
+        'two_generations_compact_mb': traced_megabytes(lambda: two_generations(True)),
+    }
+    del kept
+    saved = result['two_generations_mb'] - result['two_generations_compact_mb']
+    result['saved_mb'] = round(saved, 2)
+    result['saved_percent'] = round(saved / result['two_generations_mb'] * 100, 1)
+    return result
+
+
+def bench_size(tmp_dir, rows, repeat, requests):
+    path = os.path.join(tmp_dir, f'bench_{rows}.xlsx')
+    start = time.perf_counter()
+    write_workbook(path, rows)
+    generate_seconds = time.perf_counter() - start
+    app.EXCEL_FILE_PATH = path
+    result = {'rows': rows, 'generate_s': round(generate_seconds, 3)}
+
+    # 解析
+    parse_repeat = repeat if rows <= 10000 else 1
+    result['parse_ms'] = round(best_of(lambda: app.safe_convert_excel(path), parse_repeat) * 1000, 2)
+
+    # 完整刷新的峰值内存，同时得到后续测量用的快照
+    result['peak_memory_mb'] = measure_peak_memory()
+    snapshot = app.current_snapshot
+    result['projects'] = len(snapshot.data)
+
+    # 预警：入库时建索引一次，之后每次检查只看今天和明天的项目
+    def build_alert_index():
+        app._parse_alert_date_text.cache_clear()  # 按新数据首次入库计时
+        return app.AlertIndex(snapshot.data, app.parse_alert_dates(snapshot.data))
+    result['alert_index_ms'] = round(best_of(build_alert_index, repeat) * 1000, 3)
+    result['check_alerts_ms'] = round(best_of(lambda: app.check_alerts(snapshot.alert_index), repeat) * 1000, 3)
+    result['alerts'] = len(app.check_alerts(snapshot.alert_index))
+
+    # /api/data：首次请求需要序列化和压缩，之后复用同一快照的响应
+    client = app.app.test_client()
+    snapshot.responses.clear()
+    start = time.perf_counter()
+    first = client.get('/api/data', headers={'Accept-Encoding': 'gzip'})
+    result['api_first_ms'] = round((time.perf_counter() - start) * 1000, 2)
+    etag = first.headers.get('ETag')
+    result['api_full'] = measure_requests(client, '/api/data', requests)
+    result['api_gzip'] = measure_requests(client, '/api/data', requests, {'Accept-Encoding': 'gzip'})
+    result['api_304'] = measure_requests(client, '/api/data', requests,
+                                         {'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    result['api_page'] = measure_requests(client, '/api/data?limit=20&fields=project_name,delivery_date',
+                                          requests, {'Accept-Encoding': 'gzip'})
+    return result
+
+
+def print_result(result, stream):
+    print(f"{result['rows']:>7} 行  项目 {result['projects']:>6}  解析 {result['parse_ms']:9.1f} ms  "
+          f"峰值内存 {result['peak_memory_mb']:8.1f} MB  建预警索引 {result['alert_index_ms']:8.2f} ms  "
+          f"check_alerts {result['check_alerts_ms']:7.3f} ms", file=stream)
+    for name in ('api_full', 'api_gzip', 'api_304', 'api_page'):
+        stats = result[name]
+        print(f"          {name:<9} p50 {stats['p50_ms']:8.3f} ms  p99 {stats['p99_ms']:8.3f} ms  "
+              f"{stats['throughput_rps']:9.1f} 次/秒  {stats['bytes']:>10} 字节", file=stream)
+
+
+def print_row_memory(result, stream):
+    print(f"项目数据内存（{result['rows']} 个项目）  一代 {result['one_generation_mb']:.1f} MB"
+          f"（紧凑存储 {result['one_generation_compact_mb']:.1f} MB）  两代 {result['two_generations_mb']:.1f} MB"
+          f" → {result['two_generations_compact_mb']:.1f} MB，节省 {result['saved_mb']:.1f} MB"
+          f"（{result['saved_percent']}%，共享 {result['shared_rows']} 行）", file=stream)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=DEFAULT_ROWS)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--requests', type=int, default=100, help='每种 /api/data 请求的次数')
+    parser.add_argument('--memory-rows', type=int, default=DEFAULT_MEMORY_ROWS,
+                        help='测量项目数据常驻内存的行数，0 为不测量')
+    parser.add_argument('--startup-rows', type=int, default=DEFAULT_STARTUP_ROWS,
+                        help='测量启动时间的行数，0 为不测量')
+    parser.add_argument('--output', default='benchmark_results.json', help='JSON结果文件，- 为输出到标准输出')
+    args = parser.parse_args()
+
+    quiet_logging()
+    stream = sys.stderr if args.output == '-' else sys.stdout
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+            'requests': args.requests
+        },
+        'results': []
+    }
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        isolate_app(tmp_dir)
+        for rows in args.rows:
+            result = bench_size(tmp_dir, rows, args.repeat, args.requests)
+            report['results'].append(result)
+            print_result(result, stream)
+        if args.memory_rows:
+            report['row_memory'] = measure_row_memory(tmp_dir, args.memory_rows)
+            print_row_memory(report['row_memory'], stream)
+        app.persistence_writer.flush()
+    if args.startup_rows:
+        report['startup'] = measure_startup(args.startup_rows, args.repeat)
+        print_startup(report['startup'], stream)
+
+    content = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output == '-':
+        sys.stdout.write(content + '\n')
+    else:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(content + '\n')
+        print(f'结果已写入 {args.output}')
+
+
+if __name__ == '__main__':
+    main()
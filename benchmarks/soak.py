@@ -0,0 +1,527 @@
+# benchmarks/soak.py
+"""
+端到端负载/浸泡模拟：把几个小时的现场运行压缩到几分钟。
+  - 服务：子进程中按 python app.py 的方式启动（文件监听、定时预警、语音用 null 后端），
+    应用和 APScheduler 的时钟换成模拟时钟，按 --hours/--minutes 的倍速前进，
+    定时预警（按日期任务或 cron 模式的两个每日任务）和零点刷新在运行期间真正触发
+  - 看板：N 个虚拟看板按 dashboard.js 的节奏请求（时间间隔同样按倍速压缩）：
+      轮询看板（SSE断开）：打开页面，每30秒 refreshProjects，每60秒到点检查，预警时间点 checkForAlerts
+      SSE看板：订阅 /api/stream，data-changed 时按版本重新获取，alerts-changed/alert-fired 时 checkForAlerts
+    请求都带 ?since=<版本> 和浏览器缓存的ETag（未变化时应返回304）
+  - 计划员：按 --saves-per-hour（模拟时间）修改几个进度单元格，先写临时文件再替换工作簿（与Excel保存相同），
+    由 ExcelFileHandler 收到文件事件后刷新
+结果：请求延迟 p50/p99、错误率、解析次数（/health 的 refresh）、收到的推送事件和预警次数、服务进程内存增长。
+模拟时钟只影响应用中的 datetime/date 和调度器；缓存超时、防抖、SSE心跳等仍按真实时间。
+
+用法：
+    python benchmarks/soak.py
+    python benchmarks/soak.py --displays 40 --hours 24 --minutes 5 --rows 2000 --output soak.json
+"""
+import argparse
+import gzip
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import date, datetime, timedelta
+
+from common import app, percentile
+from synthetic import write_workbook
+
+# 子进程：装上模拟时钟后按 python app.py 的方式启动，只监听本机，就绪后输出时钟起点
+CHILD = r'''
+import sys
+sys.path.insert(0, {benchmarks!r})
+from soak import serve
+serve({port}, {sim_start!r}, {speed!r}, {schedule!r})
+'''
+WORKBOOK_NAME = app.EXCEL_FILE_PATH
+FIRST_DATA_ROW = 5  # 第1~3行为标题和周期信息，第4行为表头
+PROGRESS_COLUMNS = (9, 10, 11, 12)  # I:L 图纸、软件、仿真、清单进度
+REQUEST_TIMEOUT = 30
+STOP_TIMEOUT = 30
+
+# 模拟时钟（子进程中使用）：模拟时间 = sim_start + (真实时间 - anchor) * speed
+sim_clock = {'anchor': 0.0, 'start': 0.0, 'speed': 1.0}
+
+
+def sim_timestamp():
+    return sim_clock['start'] + (time.time() - sim_clock['anchor']) * sim_clock['speed']
+
+
+class SimClockType(type):
+    """替换后的 datetime/date 仍把真实的 datetime/date 对象（openpyxl读出的单元格等）当作实例"""
+    def __instancecheck__(cls, instance):
+        return isinstance(instance, cls.__mro__[1])
+
+    def __subclasscheck__(cls, subclass):
+        return issubclass(subclass, cls.__mro__[1])
+
+
+class SimDatetime(datetime, metaclass=SimClockType):
+    @classmethod
+    def now(cls, tz=None):
+        return cls.fromtimestamp(sim_timestamp(), tz)
+
+    @classmethod
+    def today(cls):
+        return cls.fromtimestamp(sim_timestamp())
+
+
+class SimDate(date, metaclass=SimClockType):
+    @classmethod
+    def today(cls):
+        return cls.fromtimestamp(sim_timestamp())
+
+
+def install_sim_clock(sim_start, speed):
+    """
+    应用和调度器改用模拟时钟；调度器按模拟时间算出的等待时间除以倍速。
+    未指定宽限时间的任务（cron 模式的两个每日任务）默认只有1秒宽限，按倍速放大为真实时间的1秒，
+    否则调度线程稍有延迟就会按错过处理。
+    """
+    import apscheduler.executors.base
+    import apscheduler.schedulers.base
+    import apscheduler.triggers.date
+    import apscheduler.triggers.interval
+
+    sim_clock.update(anchor=time.time(), start=sim_start, speed=speed)
+    app.datetime = SimDatetime
+    app.date = SimDate
+    for module in (apscheduler.schedulers.base, apscheduler.executors.base,
+                   apscheduler.triggers.date, apscheduler.triggers.interval):
+        module.datetime = SimDatetime
+    scheduler = app.get_scheduler()
+    scheduler._job_defaults['misfire_grace_time'] = max(1, round(speed))
+    process_jobs = scheduler._process_jobs
+
+    def scaled_process_jobs():
+        wait_seconds = process_jobs()
+        return None if wait_seconds is None else wait_seconds / speed
+    scheduler._process_jobs = scaled_process_jobs
+
+
+def serve(port, sim_start, speed, schedule):
+    """子进程入口：工作目录中的工作簿由父进程生成"""
+    from werkzeug.serving import make_server
+
+    install_sim_clock(sim_start, speed)
+    app.TTS_BACKEND = 'null'
+    app.WARM_START = False
+    if schedule:
+        app.ALERT_SCHEDULE_MODE = schedule
+    app.start_standalone()
+    server = make_server('127.0.0.1', port, app.app, threaded=True)
+    print(json.dumps({'anchor': sim_clock['anchor']}), flush=True)
+    server.serve_forever()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def process_rss_mb(pid):
+    """进程常驻内存(MB)，不支持 /proc 的平台返回None"""
+    try:
+        with open(f'/proc/{pid}/statm') as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return round(pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024), 1)
+
+
+class SoakStats:
+    """各线程共用的请求统计"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {}  # 请求类型 -> 毫秒列表
+        self.statuses = {}
+        self.errors = {}
+        self.disconnects = 0  # SSE连接断开（不计入请求错误率）
+        self.events = {}  # SSE事件 -> 次数（只统计监视连接，每个事件记一次）
+        self.alerts = []  # 收到的 alert-fired：(模拟时间, mode, 预警数)
+
+    def record(self, kind, elapsed, status=None, error=None):
+        with self._lock:
+            self.latencies.setdefault(kind, []).append(elapsed * 1000)
+            if error is not None:
+                self.errors[error] = self.errors.get(error, 0) + 1
+            else:
+                self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def disconnect(self):
+        with self._lock:
+            self.disconnects += 1
+
+    def event(self, name):
+        with self._lock:
+            self.events[name] = self.events.get(name, 0) + 1
+
+    def summary(self):
+        with self._lock:
+            everything = sorted(value for values in self.latencies.values() for value in values)
+            total = len(everything)
+            failed = sum(self.errors.values())
+
+            def quantiles(samples):
+                samples = sorted(samples)
+                return {
+                    'requests': len(samples),
+                    'p50_ms': round(percentile(samples, 0.5), 2),
+                    'p99_ms': round(percentile(samples, 0.99), 2),
+                    'max_ms': round(samples[-1], 2)
+                }
+            return {
+                'requests': total,
+                'latency': quantiles(everything) if everything else None,
+                'by_kind': {kind: quantiles(values) for kind, values in sorted(self.latencies.items())},
+                'statuses': {str(status): count for status, count in sorted(self.statuses.items())},
+                'errors': dict(self.errors),
+                'error_rate': round(failed / total, 5) if total else None,
+                'events': dict(self.events),
+                'stream_disconnects': self.disconnects,
+                'alerts_fired': [{'at': at, 'mode': mode, 'alerts': count} for at, mode, count in self.alerts]
+            }
+
+
+class SimTime:
+    """父进程按子进程的时钟起点推算模拟时间"""
+    def __init__(self, anchor, start, speed):
+        self.anchor = anchor
+        self.start = start
+        self.speed = speed
+
+    def now(self):
+        return datetime.fromtimestamp(self.start + (time.time() - self.anchor) * self.speed)
+
+    def real_delay(self, sim_seconds):
+        return sim_seconds / self.speed
+
+    def until(self, when):
+        """到模拟时间 when 还需等待的真实秒数"""
+        return max(0.0, (when.timestamp() - self.start) / self.speed + self.anchor - time.time())
+
+
+class Display:
+    """一个虚拟看板，请求节奏与 dashboard.js 相同"""
+    def __init__(self, base, stats, clock, stop, rng, settings):
+        self.base = base
+        self.stats = stats
+        self.clock = clock
+        self.stop = stop
+        self.rng = rng
+        self.settings = settings
+        self.version = None  # dataVersion
+        self.display_date = None  # displayFlags.date
+        self.etags = {}  # 浏览器缓存：地址 -> ETag
+
+    def request(self, kind, path, headers=None):
+        """返回 (状态码, 响应JSON或None)；失败计入错误，返回 (None, None)"""
+        started = time.perf_counter()
+        req = urllib.request.Request(self.base + path, headers=headers or {})
+        try:
+            try:
+                with urllib.request.urlopen(req, timeout=REQUEST_TIMEOUT) as response:
+                    status, body, encoding = response.status, response.read(), response.headers.get('Content-Encoding')
+                    etag = response.headers.get('ETag')
+            except urllib.error.HTTPError as e:
+                if e.code != 304:
+                    raise
+                status, body, encoding, etag = 304, b'', None, None
+            if status == 200 and kind.startswith('api'):
+                payload = json.loads(gzip.decompress(body) if encoding == 'gzip' else body)
+                if payload.get('status') != 'success':
+                    raise ValueError('status != success')
+            else:
+                payload = None
+        except urllib.error.HTTPError as e:
+            self.stats.record(kind, time.perf_counter() - started, error=f'HTTP {e.code}')
+            return None, None
+        except Exception as e:
+            self.stats.record(kind, time.perf_counter() - started, error=type(e).__name__)
+            return None, None
+        self.stats.record(kind, time.perf_counter() - started, status)
+        if etag:
+            self.etags[path] = etag
+        return status, payload
+
+    def fetch_data(self, kind):
+        """fetchData()：带上已同步版本，cache:'no-cache' 让浏览器带ETag验证"""
+        path = '/api/data' if self.version is None else f'/api/data?since={self.version}'
+        headers = {'Accept-Encoding': 'gzip'}
+        if path in self.etags:
+            headers['If-None-Match'] = self.etags[path]
+        return self.request(kind, path, headers)
+
+    def refresh_projects(self):
+        status, payload = self.fetch_data('api_refresh')
+        if status == 200:
+            self.version = payload['version']
+            self.display_date = (payload.get('display') or {}).get('date')
+
+    def check_for_alerts(self):
+        self.fetch_data('api_alerts')
+
+    def open_page(self):
+        self.request('page', '/', {'Accept-Encoding': 'gzip'})
+        self.refresh_projects()
+
+    def next_alert_times(self, now):
+        """scheduleAlertAt：两个预警时间点的下一次触发时间"""
+        times = []
+        for name in ('afternoon_alert_time', 'morning_alert_time'):
+            hour, minute = map(int, self.settings[name].split(':'))
+            moment = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+            times.append(moment if moment > now else moment + timedelta(days=1))
+        return times
+
+    def run_polling(self):
+        """SSE断开时的后备轮询"""
+        self.open_page()
+        self.check_for_alerts()
+        now = self.clock.now()
+        # 各看板打开页面的时间不同，轮询相位错开
+        tasks = {
+            'refresh': now + timedelta(seconds=self.rng.uniform(0, 30)),
+            'minute': now + timedelta(seconds=self.rng.uniform(0, 60))
+        }
+        for index, moment in enumerate(self.next_alert_times(now)):
+            tasks[f'alert{index}'] = moment
+        while not self.stop.is_set():
+            name, due = min(tasks.items(), key=lambda item: item[1])
+            if self.stop.wait(self.clock.until(due)):
+                break
+            if name == 'refresh':
+                self.refresh_projects()
+                tasks[name] = due + timedelta(seconds=30)
+            elif name == 'minute':
+                self.fetch_data('api_minute')
+                tasks[name] = due + timedelta(seconds=60)
+            else:
+                self.check_for_alerts()
+                tasks[name] = due + timedelta(days=1)
+
+    def run_stream(self, monitor=False):
+        """订阅 /api/stream；monitor 连接只统计事件，不请求数据"""
+        if not monitor:
+            self.open_page()
+        while not self.stop.is_set():
+            try:
+                with urllib.request.urlopen(self.base + '/api/stream', timeout=REQUEST_TIMEOUT) as stream:
+                    if not monitor:
+                        self.refresh_projects()
+                        self.check_for_alerts()
+                    event = None
+                    for raw in stream:
+                        if self.stop.is_set():
+                            return
+                        line = raw.decode('utf-8').rstrip('\n')
+                        if line.startswith('event:'):
+                            event = line[6:].strip()
+                        elif line.startswith('data:') and event:
+                            self.on_event(event, json.loads(line[5:]), monitor)
+                            event = None
+            except Exception as e:
+                if self.stop.is_set():
+                    return
+                self.stats.disconnect()
+                self.stop.wait(1)
+
+    def on_event(self, event, payload, monitor):
+        if monitor:
+            self.stats.event(event)
+            if event == 'alert-fired':
+                self.stats.alerts.append((self.clock.now().isoformat(timespec='minutes'), payload.get('mode'),
+                                          len(payload.get('alerts') or [])))
+            return
+        if event == 'data-changed':
+            if payload.get('version') != self.version or \
+                    (payload.get('date') and payload.get('date') != self.display_date):
+                self.refresh_projects()
+        elif event in ('alerts-changed', 'alert-fired'):
+            self.check_for_alerts()
+
+
+class Planner:
+    """计划员按固定频率保存工作簿：修改几个进度单元格，写临时文件后替换（触发 ExcelFileHandler 的 on_moved）"""
+    def __init__(self, path, rows, edits, rng):
+        from openpyxl import load_workbook
+        self.path = path
+        self.rows = rows
+        self.edits = edits
+        self.rng = rng
+        self.workbook = load_workbook(path)
+        self.saves = 0
+
+    def save(self):
+        sheet = self.workbook.worksheets[0]
+        for _ in range(self.edits):
+            row = FIRST_DATA_ROW + self.rng.randrange(self.rows)
+            sheet.cell(row=row, column=self.rng.choice(PROGRESS_COLUMNS)).value = self.rng.randint(0, 100)
+        temp_path = os.path.join(os.path.dirname(self.path), f'soak_save_{self.saves}.tmp')
+        self.workbook.save(temp_path)
+        os.replace(temp_path, self.path)
+        self.saves += 1
+
+    def run(self, clock, stop, saves_per_hour):
+        interval = clock.real_delay(3600 / saves_per_hour)
+        while not stop.wait(interval):
+            self.save()
+
+
+def get_json(url):
+    with urllib.request.urlopen(url, timeout=REQUEST_TIMEOUT) as response:
+        return json.load(response)
+
+
+def soak(args):
+    sim_start = datetime.combine(date.today(), datetime.strptime(args.start, '%H:%M').time())
+    speed = args.hours * 60 / args.minutes
+    rng = random.Random(args.seed)
+    work_dir = tempfile.mkdtemp(prefix='soak_')
+    port = free_port()
+    base = f'http://127.0.0.1:{port}'
+    workbook_path = os.path.join(work_dir, WORKBOOK_NAME)
+    write_workbook(workbook_path, args.rows, seed=args.seed, today=sim_start.date())
+    code = CHILD.format(benchmarks=os.path.dirname(os.path.abspath(__file__)), port=port,
+                        sim_start=sim_start.timestamp(), speed=speed, schedule=args.schedule)
+    process = subprocess.Popen([sys.executable, '-c', code], cwd=work_dir, stdout=subprocess.PIPE,
+                               stderr=subprocess.DEVNULL, text=True)
+    stop = threading.Event()
+    stats = SoakStats()
+    try:
+        line = process.stdout.readline()
+        if not line:
+            raise RuntimeError('服务进程启动失败')
+        clock = SimTime(json.loads(line)['anchor'], sim_start.timestamp(), speed)
+        health = get_json(f'{base}/health')
+        settings = get_json(f'{base}/api/data?limit=0')['alert_settings']
+        planner = Planner(workbook_path, args.rows, args.edits, rng)
+        memory = [(clock.now().isoformat(timespec='minutes'), process_rss_mb(process.pid))]
+        started_stats = dict(health['refresh'])
+
+        stream_displays = round(args.displays * args.sse_fraction)
+        threads = [threading.Thread(target=Display(base, stats, clock, stop, random.Random(), settings)
+                                    .run_stream, kwargs={'monitor': True}, daemon=True)]
+        for index in range(args.displays):
+            display = Display(base, stats, clock, stop, random.Random(rng.random()), settings)
+            threads.append(threading.Thread(target=display.run_stream if index < stream_displays
+                                            else display.run_polling, daemon=True))
+        if args.saves_per_hour:
+            threads.append(threading.Thread(target=planner.run, args=(clock, stop, args.saves_per_hour), daemon=True))
+        for thread in threads:
+            thread.start()
+
+        real_started = time.perf_counter()
+        deadline = real_started + args.minutes * 60
+        sample_interval = clock.real_delay(3600)
+        while time.perf_counter() < deadline:
+            time.sleep(max(0.0, min(sample_interval, deadline - time.perf_counter())))
+            memory.append((clock.now().isoformat(timespec='minutes'), process_rss_mb(process.pid)))
+            if process.poll() is not None:
+                raise RuntimeError(f'服务进程意外退出（{process.returncode}）')
+        stop.set()
+        health = get_json(f'{base}/health')
+        elapsed = time.perf_counter() - real_started
+    finally:
+        stop.set()
+        process.terminate()
+        try:
+            process.wait(timeout=STOP_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    refresh = {name: health['refresh'][name] - started_stats.get(name, 0)
+               for name in ('events', 'refreshes', 'parses')}
+    rss = [value for _, value in memory if value is not None]
+    return {
+        'config': {
+            'displays': args.displays,
+            'sse_displays': stream_displays,
+            'rows': args.rows,
+            'sim_start': sim_start.isoformat(timespec='minutes'),
+            'sim_hours': args.hours,
+            'real_minutes': round(elapsed / 60, 2),
+            'speed': round(speed, 1),
+            'saves_per_hour': args.saves_per_hour,
+            'schedule': args.schedule or app.ALERT_SCHEDULE_MODE
+        },
+        'workbook_saves': planner.saves,
+        'refresh': refresh,
+        'speech': health.get('speech'),
+        'memory': {
+            'start_mb': rss[0] if rss else None,
+            'end_mb': rss[-1] if rss else None,
+            'peak_mb': max(rss) if rss else None,
+            'growth_mb': round(rss[-1] - rss[0], 1) if rss else None,
+            'samples': [{'at': at, 'rss_mb': value} for at, value in memory]
+        },
+        **stats.summary()
+    }
+
+
+def print_report(result, stream):
+    config = result['config']
+    print(f"模拟 {config['sim_hours']} 小时（从 {config['sim_start']} 起，{config['speed']} 倍速，"
+          f"实际 {config['real_minutes']} 分钟）  看板 {config['displays']}（其中SSE {config['sse_displays']}）  "
+          f"{config['rows']} 行  预警任务 {config['schedule']}", file=stream)
+    latency = result['latency'] or {}
+    print(f"请求 {result['requests']}  p50 {latency.get('p50_ms')} ms  p99 {latency.get('p99_ms')} ms  "
+          f"最大 {latency.get('max_ms')} ms  错误率 {result['error_rate']}  状态 {result['statuses']}", file=stream)
+    for kind, stats in result['by_kind'].items():
+        print(f"    {kind:<12} {stats['requests']:>7} 次  p50 {stats['p50_ms']:8.2f} ms  "
+              f"p99 {stats['p99_ms']:8.2f} ms", file=stream)
+    if result['errors']:
+        print(f"错误 {result['errors']}", file=stream)
+    refresh = result['refresh']
+    print(f"工作簿保存 {result['workbook_saves']} 次  文件事件 {refresh['events']}  刷新 {refresh['refreshes']}  "
+          f"解析 {refresh['parses']}  推送事件 {result['events']}  SSE断开 {result['stream_disconnects']}", file=stream)
+    fired = ', '.join(f"{item['at']} {item['mode']}({item['alerts']})" for item in result['alerts_fired'])
+    print(f"预警触发 {len(result['alerts_fired'])} 次  {fired}", file=stream)
+    memory = result['memory']
+    print(f"服务进程内存 {memory['start_mb']} MB → {memory['end_mb']} MB（峰值 {memory['peak_mb']} MB，"
+          f"增长 {memory['growth_mb']} MB）", file=stream)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--displays', type=int, default=20, help='虚拟看板数')
+    parser.add_argument('--sse-fraction', type=float, default=0.5, help='使用SSE的看板比例，其余按SSE断开时的轮询')
+    parser.add_argument('--hours', type=float, default=12, help='模拟的时长(小时)')
+    parser.add_argument('--minutes', type=float, default=3, help='实际运行时长(分钟)')
+    parser.add_argument('--start', default='13:00', help='模拟开始的时刻（今天），默认在前一天预警时间之前')
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--saves-per-hour', type=float, default=6, help='每模拟小时保存工作簿的次数，0 为不保存')
+    parser.add_argument('--edits', type=int, default=5, help='每次保存修改的进度单元格数')
+    parser.add_argument('--schedule', choices=('date', 'cron'), default=None,
+                        help='预警任务方式，默认使用app的 ALERT_SCHEDULE_MODE')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=None, help='JSON结果文件，- 为输出到标准输出')
+    args = parser.parse_args()
+
+    stream = sys.stderr if args.output == '-' else sys.stdout
+    result = soak(args)
+    print_report(result, stream)
+    if args.output:
+        content = json.dumps(result, ensure_ascii=False, indent=2)
+        if args.output == '-':
+            sys.stdout.write(content + '\n')
+        else:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                f.write(content + '\n')
+            print(f'结果已写入 {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+# benchmarks/synthetic.py
+"""
+合成测试数据：按 safe_convert_excel 期望的版式生成 计划安排进度表.xlsx
+
+表格版式与真实进度表相同：第1~3行为标题和周期信息，第4行为表头，之后为项目数据。
+项目数据包含真实表格中常见的脏数据：'90%'、'约80'、'100%完成' 之类的进度，
+'2025.6.27'、'2025年06月24日'、'待定'、日期单元格等混合格式的预警日期，以及空行、重复表头和空单位。
+
+用法：
+    python benchmarks/synthetic.py --rows 1000 --output 计划安排进度表.xlsx
+"""
+import argparse
+import random
+from datetime import date, datetime, timedelta
+
+from openpyxl import Workbook
+
+SHEET_NAME = '进度表（6.3~6.16）'
+CLIENTS = ['蓬莱中柏京鲁船业有限公司', '大连中远海运重工有限公司', '舟山宁兴船舶修造有限公司',
+           '中船黄埔文冲船舶有限公司', '江苏新时代造船有限公司', '扬州中远海运重工有限公司', '青岛北海造船有限公司']
+SHIP_TYPES = ['49200吨油化船', '77K多用途船', '89000吨散货船', '13800吨化学品船', '48000方LPG', '1800TEU集装箱船']
+PRODUCTS = ['主配电板', '应急配电板', '组合及独立启动器', '分电箱', '充放电板', '电工实验板', '按钮盒',
+            '高压岸电系统（含2个高压岸电插座箱，2个低压岸电接线箱）', '集控台', '驾控台', '货控台', '监测报警系统']
+CLASSIFICATIONS = ['BV', 'CCS', 'ABS', 'DNV', 'LR', 'NK', 'RINA', 'DNV/CCS', 'CCS+LR', None]
+RESPONSIBLE = ['胡晓燕', '丁旭明', '郭武彬', '陈舟', '杨皓淇', '王磊', '李静']
+WORKSHOP_PROGRESS = ['待生产', '待发货', '待验收', '已发货', None]
+PERCENTS = [100, 0, 90, 50, 85.5, '90%', '约80', '100%完成', 'abc', '', None, 120, -5, '50.0']
+ALERT_CONTENTS = ['客户不看船检签字后直接发货', '待定', '需提前联系船厂确认发货时间', None, None, None]
+
+
+def alert_date_value(rng, today):
+    """混合格式的预警日期，约一半在今天前后几天内，便于 check_alerts 命中"""
+    day = today + timedelta(days=rng.randint(-3, 3)) if rng.random() < 0.5 else \
+        today + timedelta(days=rng.randint(-200, 200))
+    kind = rng.randrange(8)
+    if kind == 0:
+        return f'{day.year}.{day.month}.{day.day}'
+    if kind == 1:
+        return day.strftime('%Y年%m月%d日')
+    if kind == 2:
+        return day.strftime('%Y-%m-%d')
+    if kind == 3:
+        return datetime(day.year, day.month, day.day)
+    if kind == 4:
+        return '待定'
+    return None
+
+
+def project_row(rng, number, today):
+    """一行项目数据（14列，A:N）"""
+    products = '、'.join(rng.sample(PRODUCTS, rng.randint(1, len(PRODUCTS))))
+    delivery = today + timedelta(days=rng.randint(-30, 150))
+    responsible = '/'.join(rng.sample(RESPONSIBLE, rng.randint(1, 3)))
+    return [
+        number, rng.choice(CLIENTS), f'{rng.choice(SHIP_TYPES)}\nW{number:05d}', products,
+        rng.choice(CLASSIFICATIONS), f'{delivery.year}.{delivery.month}.{delivery.day}\n{rng.choice(["FAT", "船期"])}',
+        responsible, rng.choice(WORKSHOP_PROGRESS),
+        rng.choice(PERCENTS), rng.choice(PERCENTS), rng.choice(PERCENTS), rng.choice(PERCENTS),
+        alert_date_value(rng, today), rng.choice(ALERT_CONTENTS)
+    ]
+
+
+def write_workbook(path, rows, seed=0, sheet_name=SHEET_NAME, today=None, messy=True):
+    """
+    写一个 rows 行项目数据的工作簿。messy 为True时夹杂空行、重复表头行和空单位行
+    （这些行会被 clean_project_rows 过滤，实际项目数略少于 rows）。
+    """
+    rng = random.Random(seed)
+    today = today or date.today()
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(sheet_name)
+    sheet.append(['出货日期计划安排表'])
+    sheet.append(['计划安排周期', '2025年6月份', '2025年11月份', '部门', '研发部', '项目', 'AMS'])
+    sheet.append(['进度周期', ' 2025.6.28', ' 2025.7.8', '上次进度周期', datetime(2025, 6, 17), datetime(2025, 6, 27)])
+    sheet.append(['序号', '单位', '项目名称', '产品', '船级', '交货日期', '负责人', '车间进度',
+                  '图纸', '软件', '仿真', '清单', '预警日期', '预警内容'])
+    for number in range(1, rows + 1):
+        if messy:
+            roll = rng.random()
+            if roll < 0.01:
+                sheet.append([None] * 14)
+                continue
+            if roll < 0.015:
+                sheet.append([None, '计划出货时间', None])
+                continue
+            if roll < 0.02:
+                sheet.append([number, '  ', '单位为空的行'])
+                continue
+        sheet.append(project_row(rng, number, today))
+    workbook.save(path)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='计划安排进度表.xlsx')
+    parser.add_argument('--clean', action='store_true', help='不生成空行、重复表头等脏数据行')
+    args = parser.parse_args()
+    write_workbook(args.output, args.rows, seed=args.seed, messy=not args.clean)
+    print(f'已生成 {args.output}（{args.rows} 行）')
+
+
+if __name__ == '__main__':
+    main()
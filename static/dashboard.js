@@ -0,0 +1,687 @@
+// 存储当前项目数据 
+let currentProjectData = []; 
+let isAlertPlaying = false; 
+
+// 更新页面周期信息 
+function updatePeriodsDisplay(periods) {
+    // 计划安排周期
+    const planPeriod = periods.plan_period || "2025年6月-2025年10月";
+    document.getElementById('plan-period').innerHTML = 
+        `<i class="fas fa-database"></i> 计划安排周期: ${planPeriod}`;
+    
+    // 部门
+    const department = periods.department || "研发部";
+    document.getElementById('department').innerHTML = 
+        `<i class="fas fa-building"></i> 部门: ${department}`;
+    
+    // 项目
+    const project = periods.project || "AMS";
+    document.getElementById('project').innerHTML = 
+        `<i class="fas fa-project-diagram"></i> ${project}项目`;
+    
+    // 进度周期
+    const progressPeriod = periods.progress_period || "2025-06-17 - 2025-06-27";
+    document.getElementById('progress-period').innerHTML = 
+        `<i class="fas fa-calendar-alt"></i> 进度周期: ${progressPeriod}`;
+    
+    // 上次进度周期
+    const lastPeriod = periods.last_period || "2025-06-03 - 2025-06-16";
+    document.getElementById('last-period').innerHTML = 
+        `<i class="fas fa-calendar-day"></i> 上次进度周期: ${lastPeriod}`;
+}
+
+// 增量同步状态：按项目key保存数据，version为已同步到的数据版本
+let dataVersion = null;
+let projectsByKey = new Map();
+let projectOrder = [];
+// 服务器按日期计算的显示标记：交货临近、今天/明天预警的项目key
+let displayFlags = {date: null, due_soon: new Set(), alert_today: new Set(), alert_tomorrow: new Set()};
+
+// 带上已同步版本，服务器只返回之后的增量
+function dataUrl() {
+    return dataVersion === null ? '/api/data' : '/api/data?since=' + dataVersion;
+}
+
+// 不再用时间戳防缓存：no-cache让浏览器带ETag验证，数据未变时服务器返回304
+function fetchData() {
+    return fetch(dataUrl(), {cache: 'no-cache'});
+}
+
+// 合并全量或增量数据，返回按顺序排列的项目列表
+function applyProjectData(result) {
+    if (result.data) {
+        projectsByKey = new Map(result.data.map(item => [item.key, item]));
+        projectOrder = result.data.map(item => item.key);
+    } else if (result.delta) {
+        const delta = result.delta;
+        delta.removed.forEach(key => projectsByKey.delete(key));
+        delta.added.concat(delta.changed).forEach(item => projectsByKey.set(item.key, item));
+        if (delta.order) {
+            projectOrder = delta.order;
+        }
+    }
+    dataVersion = result.version;
+    if (result.display) {
+        displayFlags = {
+            date: result.display.date,
+            due_soon: new Set(result.display.due_soon || []),
+            alert_today: new Set(result.display.alert_today || []),
+            alert_tomorrow: new Set(result.display.alert_tomorrow || [])
+        };
+    }
+    // 序号按当前顺序重新编号
+    return projectOrder
+        .filter(key => projectsByKey.has(key))
+        .map((key, index) => Object.assign({}, projectsByKey.get(key), {id: index + 1}));
+}
+
+// 从API获取数据
+async function fetchProjectData() {
+    try {
+        const response = await fetchData();
+        
+        if (!response.ok) {
+            console.error('API请求失败:', response.status);
+            return [];
+        }
+        
+        const result = await response.json();
+        console.log('API响应数据:', result);
+        
+        if (result.status === 'success') {
+            // 比已应用的版本旧的响应（多进程部署时落后的工作进程）丢弃，不回退数据
+            if (dataVersion !== null && result.version < dataVersion) {
+                return null;
+            }
+            document.getElementById('data-status').classList.remove('inactive');
+            document.getElementById('data-status').classList.add('active');
+            
+            // 更新周期信息
+            if (result.periods) {
+                updatePeriodsDisplay(result.periods);
+            }
+            
+            return applyProjectData(result);
+        }
+        return [];
+    } catch (error) {
+        console.error('获取项目数据失败:', error);
+        document.getElementById('data-status').classList.remove('active');
+        document.getElementById('data-status').classList.add('inactive');
+        return [];
+    }
+}
+
+// 已渲染的行：项目key -> {row, clone, html}，每次刷新只修改内容变化的行
+const renderedRows = new Map();
+
+// 一行的类名和内容
+function renderRow(item, i) {
+    // 交货临近（蓝色呼吸效果）、预警日期和状态分类都由服务器计算
+    let className = 'table-row';
+    if (displayFlags.due_soon.has(item.key)) className += ' highlight';
+    if (displayFlags.alert_today.has(item.key)) className += ' alert-today';
+    else if (displayFlags.alert_tomorrow.has(item.key)) className += ' alert-tomorrow';
+    const statusClass = 'status-' + (item.status || 'production');
+    const workshop = item.workshop_progress || '';
+    
+    // 确保进度值是数字
+    const drawing = typeof item.drawing === 'number' ? item.drawing : 0;
+    const software = typeof item.software === 'number' ? item.software : 0;
+    const simulation = typeof item.simulation === 'number' ? item.simulation : 0;
+    const listing = typeof item.listing === 'number' ? item.listing : 0;
+    
+    const html = `
+        <div class="row-cell">${item.id || i + 1}</div>
+        <div class="row-cell long-text">${item.client || '未知单位'}</div>
+        <div class="row-cell long-text">${item.project_name || '未命名项目'}</div>
+        <div class="row-cell">${item.classification || '无'}</div>
+        <div class="row-cell">
+            ${item.delivery_label || item.delivery_date || '未指定'}
+            ${item.delivery_mark ? 
+                `<span class="delivery-mark ${item.delivery_mark}">
+                    <i class="fas fa-${item.delivery_mark === 'FAT' ? 'clipboard-check' : 'ship'}"></i>
+                    ${item.delivery_mark}
+                </span>` : ''
+            }
+        </div>
+        <div class="row-cell long-text">${item.responsible || '未指定'}</div>
+        <div class="row-cell"><span class="status-tag ${statusClass}">${workshop}</span></div>
+        <div class="row-cell progress-cell">
+            ${drawing}%
+            <div class="progress-bar" style="width:${drawing}%"></div>
+        </div>
+        <div class="row-cell progress-cell">
+            ${software}%
+            <div class="progress-bar" style="width:${software}%"></div>
+        </div>
+        <div class="row-cell progress-cell">
+            ${simulation}%
+            <div class="progress-bar" style="width:${simulation}%"></div>
+        </div>
+        <div class="row-cell progress-cell">
+            ${listing}%
+            <div class="progress-bar" style="width:${listing}%"></div>
+        </div>
+    `;
+    return {className, html};
+}
+
+// 生成表格行：按项目key增量更新，表格和滚动副本两个元素始终保留（不打断滚动动画）
+function generateTableRows(projectData) {
+    const container = document.getElementById('projects-container');
+    const cloneContainer = document.getElementById('projects-container-clone');
+    
+    if (!projectData || projectData.length === 0) {
+        renderedRows.clear();
+        container.innerHTML = `
+            <div class="table-row">
+                <div class="row-cell" style="grid-column:1/-1;text-align:center;padding:20px">
+                    没有找到项目数据
+                </div>
+            </div>
+        `;
+        cloneContainer.innerHTML = '';
+        return;
+    }
+    if (renderedRows.size === 0) {
+        // 去掉"没有找到项目数据"之类的旧内容
+        container.innerHTML = '';
+        cloneContainer.innerHTML = '';
+    }
+    
+    const keys = new Set();
+    const entries = projectData.map((item, i) => {
+        const key = item.key || String(item.id || i + 1);
+        keys.add(key);
+        const {className, html} = renderRow(item, i);
+        let entry = renderedRows.get(key);
+        if (!entry) {
+            entry = {row: document.createElement('div'), clone: document.createElement('div'), html: null};
+            renderedRows.set(key, entry);
+        }
+        const signature = className + html;
+        if (entry.html !== signature) {
+            // 只有内容或样式变化的行才改动DOM
+            entry.row.className = entry.clone.className = className;
+            entry.row.innerHTML = entry.clone.innerHTML = html;
+            entry.html = signature;
+        }
+        return entry;
+    });
+    
+    // 删除已不存在的项目
+    renderedRows.forEach((entry, key) => {
+        if (!keys.has(key)) {
+            entry.row.remove();
+            entry.clone.remove();
+            renderedRows.delete(key);
+        }
+    });
+    
+    // 按新顺序排列，位置没变的行不移动
+    let cursor = container.firstElementChild;
+    let cloneCursor = cloneContainer.firstElementChild;
+    entries.forEach(entry => {
+        if (entry.row === cursor) {
+            cursor = cursor.nextElementSibling;
+            cloneCursor = cloneCursor.nextElementSibling;
+        } else {
+            container.insertBefore(entry.row, cursor);
+            cloneContainer.insertBefore(entry.clone, cloneCursor);
+        }
+    });
+}
+
+// 更新天气函数
+function updateWeather() {
+    const weatherConditions = [
+        { icon: 'fa-sun', text: '晴', temp: 26 },
+        { icon: 'fa-cloud-sun', text: '多云', temp: 24 },
+        { icon: 'fa-cloud', text: '阴', temp: 23 },
+        { icon: 'fa-cloud-rain', text: '小雨', temp: 22 }
+    ];
+    
+    const randomWeather = weatherConditions[Math.floor(Math.random() * weatherConditions.length)];
+    
+    document.getElementById('weather-display').innerHTML = `
+        <i class="fas ${randomWeather.icon}"></i>
+        <span>舟山 ${randomWeather.text} ${randomWeather.temp}℃</span>
+    `;
+}
+
+// 更新时间函数（使用本地时间）
+function updateTime() {
+    const now = new Date();
+    
+    const year = now.getFullYear();
+    const month = String(now.getMonth() + 1).padStart(2, '0');
+    const day = String(now.getDate()).padStart(2, '0');
+    const hours = String(now.getHours()).padStart(2, '0');
+    const minutes = String(now.getMinutes()).padStart(2, '0');
+    const seconds = String(now.getSeconds()).padStart(2, '0');
+    
+    const dateStr = `${year}-${month}-${day}`;
+    const timeStr = `${hours}:${minutes}:${seconds}`;
+    
+    document.getElementById('current-time').textContent = `${dateStr} ${timeStr}`;
+    document.getElementById('last-update').textContent = timeStr;
+    
+    // 更新天数计数器
+    try {
+        // 尝试从页面元素中获取上次进度周期结束日期
+        const lastPeriodText = document.getElementById('last-period').textContent;
+        // 提取结束日期部分
+        const dateRange = lastPeriodText.split('-');
+        if (dateRange.length >= 2) {
+            const lastEndDateStr = dateRange[1].trim().split(' ')[0];
+            const lastCycleEnd = new Date(lastEndDateStr);
+            
+            // 计算天数差
+            const timeDiff = now - lastCycleEnd;
+            const diffDays = Math.floor(timeDiff / (1000 * 60 * 60 * 24));
+            document.getElementById('days-counter').textContent = diffDays;
+            return;
+        }
+    } catch (e) {
+        console.warn("天数计数器错误:", e);
+    }
+    
+    // 默认计算
+    try {
+        const lastCycleEnd = new Date('2025-06-16');
+        const timeDiff = now - lastCycleEnd;
+        const diffDays = Math.floor(timeDiff / (1000 * 60 * 60 * 24));
+        document.getElementById('days-counter').textContent = diffDays;
+    } catch (e) {
+        console.error("默认天数计算错误:", e);
+    }
+}
+
+// 显示预警弹窗
+function showAlert(alerts) {
+    console.log("显示预警弹窗:", alerts);
+    
+    const alertPopup = document.getElementById('alert-popup');
+    const alertContent = document.getElementById('alert-content');
+    
+    // 更新预警内容
+    alertContent.innerHTML = '';
+    
+    alerts.forEach(alert => {
+        // 中央弹窗内容
+        const alertItem = document.createElement('div');
+        alertItem.className = 'alert-item';
+        alertItem.innerHTML = `
+            <div class="alert-project">${alert.project_name}</div>
+            <div class="alert-date">预警日期: ${alert.alert_date}</div>
+            <div class="alert-message">预警内容: ${alert.alert_content}</div>
+        `;
+        alertContent.appendChild(alertItem);
+    });
+    
+    // 显示中央弹窗
+    alertPopup.classList.remove('hidden');
+    
+    // 播放语音
+    playAlertVoice(alerts);
+    
+    // 更新预警状态
+    document.getElementById('alert-status').textContent = '预警中';
+    document.getElementById('alert-status').style.color = '#ff5252';
+}
+
+// 播放语音 - 确保界面显示和语音兼容
+function playAlertVoice(alerts) {
+    console.log("开始播放预警语音");
+    
+    // 确保先显示弹窗
+    document.getElementById('alert-popup').classList.remove('hidden');
+    
+    // 检查浏览器是否支持语音API
+    if (!('speechSynthesis' in window)) {
+        console.warn("浏览器不支持语音合成");
+        // 3秒后自动隐藏弹窗
+        setTimeout(() => {
+            document.getElementById('alert-popup').classList.add('hidden');
+            isAlertPlaying = false;
+        }, 3000);
+        return;
+    }
+    
+    isAlertPlaying = true;
+    
+    let alertMessage = "";
+    alerts.forEach(alert => {
+        // 只拼接项目名称、预警日期和预警内容
+        if (alert.project_name && alert.alert_date && alert.alert_content) {
+            // 跳过空白内容
+            if (alert.alert_content.trim() === "" || alert.alert_content === "待定") {
+                return;
+            }
+            alertMessage += `${alert.project_name}，${alert.alert_date}，${alert.alert_content}。`;
+        }
+    });
+    
+    // 确保有实际内容才播放
+    if (!alertMessage) {
+        console.log("跳过语音播报：预警内容为空或无效");
+        // 3秒后自动隐藏弹窗
+        setTimeout(() => {
+            document.getElementById('alert-popup').classList.add('hidden');
+            isAlertPlaying = false;
+        }, 3000);
+        return;
+    }
+
+    const speech = new SpeechSynthesisUtterance(alertMessage);
+    speech.lang = 'zh-CN';
+    speech.rate = 1.0;
+    speech.pitch = 1.0;
+    
+    // 播放两次
+    let count = 0;
+    const play = () => {
+        if (count < 2) {
+            // 确保每次播放前弹窗可见
+            document.getElementById('alert-popup').classList.remove('hidden');
+            console.log(`播放第${count+1}次语音`);
+            window.speechSynthesis.speak(speech);
+            count++;
+            // 两次播放之间间隔3秒
+            setTimeout(play, 3000);
+        } else {
+            console.log("语音播放结束，隐藏弹窗");
+            // 两次播放结束后隐藏弹窗
+            setTimeout(() => {
+                document.getElementById('alert-popup').classList.add('hidden');
+                isAlertPlaying = false;
+            }, 1000);
+        }
+    };
+    play();
+}
+
+// 测试预警功能
+function testAlert() {
+    console.log("触发测试预警");
+    showAlert([{
+        project_name: "测试项目",
+        alert_date: new Date().toISOString().split('T')[0],
+        alert_content: "这是一个测试预警，用于验证系统功能是否正常"
+    }]);
+}
+
+// 保存预警时间设置
+function saveSettings() {
+    const afternoonTime = document.getElementById('afternoon-time').value;
+    const morningTime = document.getElementById('morning-time').value;
+    
+    // 保存到localStorage
+    localStorage.setItem('alertSettings', JSON.stringify({
+        afternoonTime: afternoonTime,
+        morningTime: morningTime
+    }));
+    
+    // 发送到后端保存
+    fetch('/api/save_settings', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify({
+            afternoon_alert_time: afternoonTime,
+            morning_alert_time: morningTime
+        })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if(data.status === 'success') {
+            showAlert([{
+                project_name: "系统设置",
+                alert_date: new Date().toISOString().split('T')[0],
+                alert_content: "预警时间设置已保存"
+            }]);
+        } else {
+            console.error('保存设置失败:', data.message);
+            showAlert([{
+                project_name: "系统设置",
+                alert_date: new Date().toISOString().split('T')[0],
+                alert_content: "保存设置失败: " + (data.message || "未知错误")
+            }]);
+        }
+    })
+    .catch(error => {
+        console.error('保存设置失败', error);
+        showAlert([{
+            project_name: "系统设置",
+            alert_date: new Date().toISOString().split('T')[0],
+            alert_content: "保存设置失败，请检查网络连接"
+        }]);
+    });
+    
+    // 隐藏设置面板
+    document.getElementById('settings-panel').classList.add('hidden');
+}
+
+// 切换设置面板显示
+function toggleSettings() {
+    const panel = document.getElementById('settings-panel');
+    if (panel.classList.contains('hidden')) {
+        panel.classList.remove('hidden');
+    } else {
+        panel.classList.add('hidden');
+    }
+}
+
+// 更新滚屏内容
+function updateTicker(alerts) {
+    console.log('[updateTicker] alerts:', alerts);
+    const ticker = document.getElementById('alert-ticker');
+    const tickerContent = document.getElementById('ticker-content');
+    // 过滤掉系统预警（测试预警和设置保存成功的预警）
+    const filteredAlerts = alerts.filter(alert => 
+        alert.project_name !== "系统设置" && alert.project_name !== "测试项目"
+    );
+    if (filteredAlerts.length === 0) {
+        ticker.classList.add('hidden');
+        tickerContent.innerHTML = '<span style="color:#fff">当前无预警</span>';
+        console.log('[updateTicker] 没有可显示的预警');
+        return;
+    }
+    ticker.classList.remove('hidden');
+    tickerContent.innerHTML = '';
+    filteredAlerts.forEach(alert => {
+        const item = document.createElement('div');
+        item.className = 'ticker-item';
+        item.innerHTML = `
+            <span class="ticker-project">${alert.project_name}</span>
+            <span class="ticker-date">预警日期: ${alert.alert_date}</span>
+            <span class="ticker-message">${alert.alert_content}</span>
+        `;
+        tickerContent.appendChild(item);
+    });
+}
+
+// 检查是否需要预警
+function checkForAlerts({showPopup = false} = {}) {
+    fetchData()
+    .then(response => response.json())
+    .then(result => {
+        console.log('[checkForAlerts] active_alerts:', result.active_alerts);
+        if (result.status === 'success') {
+            const activeAlerts = result.active_alerts || [];
+            if (showPopup && activeAlerts.length > 0 && !isAlertPlaying) {
+                showAlert(activeAlerts);
+            } else if (activeAlerts.length === 0) {
+                document.getElementById('alert-popup').classList.add('hidden');
+                document.getElementById('alert-status').textContent = '监控中';
+                document.getElementById('alert-status').style.color = '#89cff0';
+            }
+            updateTicker(activeAlerts);
+        } else {
+            console.log('[checkForAlerts] result.status!=success', result);
+        }
+    })
+    .catch(error => {
+        console.error('获取预警数据失败', error);
+    });
+}
+
+// 只在设置的两个时间点自动弹窗和语音
+function scheduleAlertAt(timeStr, callback) {
+    function getNextTriggerTime(timeStr) {
+        const now = new Date();
+        const [h, m] = timeStr.split(":").map(Number);
+        let next = new Date(now.getFullYear(), now.getMonth(), now.getDate(), h, m, 0, 0);
+        if (now >= next) {
+            // 已过今天，设为明天
+            next.setDate(next.getDate() + 1);
+        }
+        return next;
+    }
+    function schedule() {
+        const next = getNextTriggerTime(timeStr);
+        const delay = next - new Date();
+        setTimeout(() => {
+            callback();
+            schedule(); // 递归下一次
+        }, delay);
+    }
+    schedule();
+}
+
+// 刷新项目表格：同一时间只有一个请求，请求期间再次触发（SSE推送和轮询）时结束后再刷新一次，
+// 响应按顺序应用，较早的 ?since= 增量不会在较新的之后到达
+let refreshInFlight = null;
+let refreshPending = false;
+function refreshProjects() {
+    if (refreshInFlight) {
+        refreshPending = true;
+        return refreshInFlight;
+    }
+    refreshInFlight = fetchProjectData().then(projectData => {
+        if (projectData) {
+            window.currentProjectData = projectData;
+            generateTableRows(projectData);
+        }
+    }).finally(() => {
+        refreshInFlight = null;
+        if (refreshPending) {
+            refreshPending = false;
+            refreshProjects();
+        }
+    });
+    return refreshInFlight;
+}
+
+// SSE推送：连接正常时暂停轮询，断开后轮询自动恢复
+const STREAM_RETRY_DELAY = 60 * 1000;
+let streamConnected = false;
+function connectStream() {
+    if (!('EventSource' in window)) {
+        return;
+    }
+    const source = new EventSource('/api/stream');
+    source.onopen = () => {
+        streamConnected = true;
+        // 连接（或重连）后补齐断开期间的变化
+        refreshProjects();
+        checkForAlerts({showPopup: false});
+    };
+    source.onerror = () => {
+        streamConnected = false;
+        // 服务器连接数已满（503）时浏览器不再自动重连，稍后重新订阅，期间按30秒轮询
+        if (source.readyState === EventSource.CLOSED) {
+            setTimeout(connectStream, STREAM_RETRY_DELAY);
+        }
+    };
+    source.addEventListener('data-changed', event => {
+        const payload = JSON.parse(event.data);
+        if (payload.version !== dataVersion || (payload.date && payload.date !== displayFlags.date)) {
+            refreshProjects();
+        }
+    });
+    source.addEventListener('alerts-changed', () => {
+        checkForAlerts({showPopup: false});
+    });
+    source.addEventListener('alert-fired', event => {
+        const payload = JSON.parse(event.data);
+        if (payload.alerts && payload.alerts.length > 0 && !isAlertPlaying) {
+            showAlert(payload.alerts);
+        }
+        checkForAlerts({showPopup: false});
+    });
+}
+
+// 定时点强制弹窗+语音（SSE断开时的后备轮询）
+let lastAlertMinute = '';
+setInterval(async function() {
+    if (streamConnected) return;
+    const res = await fetchData();
+    if (!res.ok) return;
+    const data = await res.json();
+    if (!data || !data.alert_settings) return;
+    const now = new Date();
+    const hour = now.getHours();
+    const minute = now.getMinutes();
+    const mArr = data.alert_settings.morning_alert_time.split(':').map(Number);
+    const aArr = data.alert_settings.afternoon_alert_time.split(':').map(Number);
+    const nowKey = `${hour}:${minute}`;
+    // 只要到点且有active_alerts就强制弹窗+语音
+    if ((hour === mArr[0] && minute === mArr[1]) || (hour === aArr[0] && minute === aArr[1])) {
+        if (data.active_alerts && data.active_alerts.length > 0 && lastAlertMinute !== nowKey) {
+            showAlert(data.active_alerts);
+            lastAlertMinute = nowKey;
+        }
+    }
+}, 60000);
+
+// 初始化页面
+document.addEventListener('DOMContentLoaded', () => {
+    // 变量声明提前，彻底修复作用域问题
+    let afternoonTime = "13:59";
+    let morningTime = "00:00";
+    // 尝试从localStorage加载设置
+    const savedSettings = localStorage.getItem('alertSettings');
+    if (savedSettings) {
+        const settings = JSON.parse(savedSettings);
+        afternoonTime = settings.afternoonTime || "13:59";
+        morningTime = settings.morningTime || "00:00";
+        document.getElementById('afternoon-time').value = afternoonTime;
+        document.getElementById('morning-time').value = morningTime;
+    }
+    
+    // 初始更新时间
+    updateTime();
+    setInterval(updateTime, 1000);
+    
+    // 初始更新天气
+    updateWeather();
+    setInterval(updateWeather, 30 * 60 * 1000);
+    
+    // 初始加载数据
+    refreshProjects();
+    
+    // 订阅服务器推送
+    connectStream();
+    
+    // 每30秒刷新数据（SSE断开时的后备轮询）
+    setInterval(() => {
+        if (streamConnected) return;
+        refreshProjects();
+    }, 30 * 1000);
+    
+    // 只在"前一天时间"自动弹窗（SSE连接时由服务器alert-fired推送）
+    scheduleAlertAt(afternoonTime, () => {
+        if (streamConnected) return;
+        checkForAlerts({showPopup: true});
+    });
+    // 只在"当天时间"自动弹窗
+    scheduleAlertAt(morningTime, () => {
+        if (streamConnected) return;
+        checkForAlerts({showPopup: true});
+    });
+    // 页面加载时立即刷新滚屏，保证有预警马上显示
+    checkForAlerts({showPopup: false});
+});
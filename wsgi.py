@@ -0,0 +1,23 @@
+# wsgi.py
+"""
+多进程部署入口（不使用 Flask 开发服务器）：
+
+    gunicorn -w 4 -k gthread --threads 32 -b 0.0.0.0:5000 wsgi:app
+
+容量：gthread 下每个 /api/stream（SSE）连接一直占用一个线程。每个工作进程最多保持
+STREAM_MAX_CLIENTS（默认24）个SSE连接，超过时返回503，看板改为每30秒轮询 /api/data、一分钟后再尝试订阅；
+其余线程（上面为每进程8个）留给 /api/data、/metrics 等请求。--threads 必须大于 STREAM_MAX_CLIENTS，
+上面的配置最多约 4 × 24 = 96 个看板同时使用SSE，看板更多时增加 -w 或同时调大 --threads 和 STREAM_MAX_CLIENTS。
+
+每个工作进程导入本模块时竞争领导锁（SHARED_STATE_DIR/leader.lock）：
+  - 领导进程：监听工作簿、解析、定时预警和语音播报，每个新快照写入共享文件，
+    常用的 /api/data 响应（全量和最近几个版本起的增量）只序列化、压缩一次
+  - 其余进程：载入共享快照，常用的 /api/data 响应直接从映射的响应体文件返回，
+    提供 /api/stream，不解析、不播报
+领导进程退出后，由一个工作进程接管。
+不要使用 gunicorn 的 --preload（领导锁必须在各工作进程中获取）。
+"""
+import app as monitor
+
+monitor.start_shared_mode()
+app = monitor.app